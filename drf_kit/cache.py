@@ -1,11 +1,491 @@
-from datetime import timedelta
+import functools
+import gzip
+import hashlib
+import inspect
+import json
+import logging
+import math
+import random
+import struct
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timedelta
+from functools import WRAPPER_ASSIGNMENTS, wraps
 from wsgiref import handlers
 
-from django.http import HttpResponse
-from django.utils.timezone import now
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured, SynchronousOnlyOperation
+from django.db import connections, router, transaction
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_save
+from django.http import Http404, HttpResponse, HttpResponseNotModified, QueryDict, StreamingHttpResponse
+from django.http.response import HttpResponseBase, ResponseHeaders
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.connection import ConnectionProxy
+from django.utils.http import parse_etags
+from django_filters import MultipleChoiceFilter
+from rest_framework import serializers, status
+from rest_framework.exceptions import NotFound
+from rest_framework.generics import GenericAPIView
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework_extensions.cache import decorators
 from rest_framework_extensions.key_constructor import bits
 from rest_framework_extensions.key_constructor.constructors import KeyConstructor
+from rest_framework_extensions.settings import extensions_api_settings
+
+from drf_kit import signals
+from drf_kit.filters import BaseFilterSet
+from drf_kit.settings import toolkit_api_settings
+
+logger = logging.getLogger(__name__)
+
+_batched_invalidation = threading.local()
+
+GENERATION_KEY_PREFIX = "drf_kit:generation"
+TAG_KEY_PREFIX = "drf_kit:tag"
+TAG_CLOCK_KEY = f"{TAG_KEY_PREFIX}:clock"
+
+# Cached entries are stored as: magic, layout version, status code and metadata length, then the metadata and the content
+ENTRY_HEADER = struct.Struct("!2sBHI")
+ENTRY_MAGIC = b"DK"
+ENTRY_VERSION = 1
+
+# Errors cached for the negative timeout, instead of the regular timeout
+NEGATIVE_STATUS_CODES = {status.HTTP_404_NOT_FOUND, status.HTTP_410_GONE}
+
+# Options given as these strings are values, instead of the names of view attributes
+COMPRESSION_ENCODINGS = ("gzip", "br", "zstd")
+AVAILABILITY_EXPIRY_MODES = ("model", "instances")
+
+# Headers that are not replayed from cached entries
+UNCACHED_HEADERS = {"content-length", "set-cookie", "age", "x-cache", "x-cache-tier"}
+
+
+@functools.cache
+def _get_refresh_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(
+        max_workers=toolkit_api_settings.CACHE_REFRESH_WORKERS,
+        thread_name_prefix="drf-kit-cache-refresh",
+    )
+
+
+def _get_generation_cache():
+    return caches[extensions_api_settings.DEFAULT_USE_CACHE]
+
+
+def _get_generation_key(model: type[Model]) -> str:
+    return f"{GENERATION_KEY_PREFIX}:{model._meta.concrete_model._meta.label_lower}"
+
+
+def _get_generation(key: str) -> int:
+    cache = _get_generation_cache()
+
+    generation = cache.get(key)
+    if generation is None:
+        # An evicted counter must never restart from a value that was already used,
+        # otherwise entries cached before the eviction would become reachable again
+        cache.add(key, time.time_ns(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def _bump_generation(key: str) -> int:
+    cache = _get_generation_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+        return cache.get(key)
+
+
+def get_model_generation(model: type[Model]) -> int:
+    return _get_generation(key=_get_generation_key(model=model))
+
+
+def bump_model_generation(model: type[Model]) -> None:
+    if (pending := getattr(_batched_invalidation, "models", None)) is not None:
+        pending.add(model)
+        return
+
+    # Multi-table children are listed by their parents' endpoints as well
+    keys = [_get_generation_key(model=klass) for klass in [model, *model._meta.get_parent_list()]]
+    # Bumped once the write is visible: a read before the commit would cache the old rows under the new generation
+    transaction.on_commit(
+        functools.partial(_bump_generations, keys=keys), using=router.db_for_write(model), robust=True
+    )
+
+
+def _bump_generations(keys: list[str]) -> None:
+    for key in keys:
+        _bump_generation(key=key)
+
+
+def get_partition_generation(partition: str) -> int:
+    return _get_generation(key=f"{GENERATION_KEY_PREFIX}:partition:{partition}")
+
+
+def bump_partition_generation(partition: str) -> None:
+    _bump_generation(key=f"{GENERATION_KEY_PREFIX}:partition:{partition}")
+
+
+def is_tagged_model(model: type[Model] | None) -> bool:
+    return getattr(model, "cache_object_tags", False)
+
+
+def _get_tag_key(model: type[Model], pk) -> str:
+    return f"{TAG_KEY_PREFIX}:{model._meta.concrete_model._meta.label_lower}:{pk}"
+
+
+def invalidate_object_tags(model: type[Model], pks: Iterable) -> None:
+    tags = {_get_tag_key(model=klass, pk=pk) for klass in [model, *model._meta.get_parent_list()] for pk in pks}
+    using = router.db_for_write(model)
+
+    if (pending := getattr(_batched_invalidation, "tags", None)) is not None:
+        pending.setdefault(using, set()).update(tags)
+        return
+
+    _write_object_tags(tags=tags, using=using)
+
+
+def _write_object_tags(tags: set[str], using: str) -> None:
+    if tags:
+        # Same as the generations, the tags are only written once the write is visible
+        transaction.on_commit(functools.partial(_set_object_tags, tags=tags), using=using, robust=True)
+
+
+def _set_object_tags(tags: set[str]) -> None:
+    # Entries tagged before this point of the tag clock become invalid, all of them in a single write
+    version = _bump_generation(key=TAG_CLOCK_KEY)
+    _get_generation_cache().set_many(dict.fromkeys(tags, version), timeout=None)
+
+
+def _get_instances_tags(model: type[Model], instances) -> list[str]:
+    if isinstance(instances, Model):
+        instances = [instances]
+    return [_get_tag_key(model=model, pk=instance.pk) for instance in instances]
+
+
+def _get_entry_tags(response_dict) -> list[str]:
+    if isinstance(response_dict, HttpResponseBase):
+        return []
+    return response_dict[3].get("tags") or []
+
+
+def _tag_versions_valid(response_dict, versions: dict[str, int]) -> bool:
+    return all(version <= response_dict[3]["tagged_at"] for version in versions.values())
+
+
+def _tags_valid(response_dict) -> bool:
+    if not (tags := _get_entry_tags(response_dict=response_dict)):
+        return True
+    return _tag_versions_valid(response_dict=response_dict, versions=_get_generation_cache().get_many(tags))
+
+
+async def _atags_valid(response_dict) -> bool:
+    if not (tags := _get_entry_tags(response_dict=response_dict)):
+        return True
+    return _tag_versions_valid(response_dict=response_dict, versions=await _get_generation_cache().aget_many(tags))
+
+
+@contextmanager
+def batch_cache_invalidation():
+    """Collect the invalidations within the block, and apply them at once when it exits"""
+    if getattr(_batched_invalidation, "tags", None) is not None:
+        yield
+        return
+
+    _batched_invalidation.tags, _batched_invalidation.models = {}, set()
+    try:
+        yield
+    finally:
+        tags, models = _batched_invalidation.tags, _batched_invalidation.models
+        _batched_invalidation.tags = _batched_invalidation.models = None
+
+        for model in models:
+            bump_model_generation(model=model)
+        for using, using_tags in tags.items():
+            _write_object_tags(tags=using_tags, using=using)
+
+
+def invalidate_model_generation(sender, signal=None, instance=None, created=False, **kwargs):
+    if signal is post_save and not created and instance is not None and is_tagged_model(model=sender):
+        # Updates only affect the entries containing the object, as long as they don't move it across lists
+        invalidate_object_tags(model=sender, pks=[instance.pk])
+    else:
+        bump_model_generation(model=sender)
+
+
+def track_model_generation(model: type[Model]) -> None:
+    post_save.connect(invalidate_model_generation, model)
+    post_delete.connect(invalidate_model_generation, model)
+    signals.post_soft_delete.connect(invalidate_model_generation, model)
+    signals.post_undelete.connect(invalidate_model_generation, model)
+
+
+def _calculate_etag(content: bytes) -> str:
+    return f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+
+def _etag_matches(etag: str | None, if_none_match: str | None) -> bool:
+    if not etag or not if_none_match:
+        return False
+
+    # If-None-Match uses the weak comparison: only the opaque tags must match
+    etags = parse_etags(if_none_match)
+    return "*" in etags or etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in etags}
+
+
+def _fresh_etag(value: tuple[str, float | None] | str | None) -> str | None:
+    # Past the soft expiry, the full entry must be read, so that it gets refreshed
+    if isinstance(value, tuple | list):
+        etag, refresh_at = value
+        if refresh_at is not None and refresh_at <= timezone.now().timestamp():
+            return None
+        return etag
+    return value
+
+
+def _not_modified(etag: str) -> HttpResponseNotModified:
+    response = HttpResponseNotModified()
+    response["ETag"] = etag
+    return response
+
+
+def _is_empty(response) -> bool:
+    data = getattr(response, "data", None)
+    if isinstance(data, dict):
+        data = data.get("results")
+    return isinstance(data, list) and not data
+
+
+def _should_refresh_early(meta: dict, now: float, beta: float) -> bool:
+    expires_at, fill_time = meta.get("expires_at"), meta.get("fill_time")
+    if not beta or expires_at is None or fill_time is None:
+        return False
+
+    # XFetch: the closer to expiring, and the longer it takes to rebuild, the likelier the entry is refreshed early
+    return now - fill_time * beta * math.log(1 - random.random()) >= expires_at
+
+
+def _gateway_timeout() -> Response:
+    return Response({"detail": "The response is not cached."}, status=status.HTTP_504_GATEWAY_TIMEOUT)
+
+
+def _parse_cache_control(header: str) -> dict[str, str | None]:
+    directives = {}
+    for directive in header.split(","):
+        name, _, value = directive.partition("=")
+        if name := name.strip().lower():
+            directives[name] = value.strip().strip('"') or None
+    return directives
+
+
+def _parse_max_age(cache_control: dict[str, str | None]) -> int | None:
+    try:
+        return max(0, int(cache_control["max-age"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _get_chunk_keys(key: str, chunks: dict) -> list[str]:
+    return [f"{key}:chunk:{chunks['id']}:{index}" for index in range(chunks["count"])]
+
+
+def _join_chunks(response_dict: tuple, chunk_keys: list[str], found: dict) -> tuple | None:
+    if len(found) != len(chunk_keys):
+        # Chunks might be evicted independently, making the whole entry missing
+        return None
+    return ([found[chunk_key] for chunk_key in chunk_keys], *response_dict[1:])
+
+
+def _encode_entry(content: bytes, status_code: int, headers: list[tuple[str, str]], meta: dict) -> bytes:
+    metadata = json.dumps({"headers": headers, "meta": meta}, separators=(",", ":")).encode()
+    return ENTRY_HEADER.pack(ENTRY_MAGIC, ENTRY_VERSION, status_code, len(metadata)) + metadata + content
+
+
+def _decode_entry(entry) -> tuple | HttpResponseBase | None:
+    if entry is None or isinstance(entry, HttpResponseBase):
+        # In older versions, the view cache is the whole response object
+        return entry
+
+    if isinstance(entry, bytes):
+        if len(entry) < ENTRY_HEADER.size:
+            return None
+        magic, version, status_code, length = ENTRY_HEADER.unpack_from(entry)
+        if magic != ENTRY_MAGIC or version != ENTRY_VERSION:
+            # Unknown layouts are treated as missing, and get rebuilt
+            return None
+
+        offset = ENTRY_HEADER.size + length
+        metadata = json.loads(entry[ENTRY_HEADER.size : offset])
+        return entry[offset:], status_code, metadata["headers"], metadata["meta"]
+
+    # Entries cached as tuples, before the binary layout
+    content, status_code, headers, *extra = entry
+    return content, status_code, list(headers.items()), extra[0] if extra else {}
+
+
+def _get_entry_age(response_dict) -> float | None:
+    if isinstance(response_dict, HttpResponseBase):
+        return None
+    if (created_at := response_dict[3].get("created_at")) is None:
+        return None
+    return timezone.now().timestamp() - created_at
+
+
+def _is_too_old(response_dict, max_age: int | None) -> bool:
+    if max_age is None:
+        return False
+    age = _get_entry_age(response_dict=response_dict)
+    return age is None or age > max_age
+
+
+class LocalCache:
+    """In-process LRU cache, bounded by the size of the cached contents"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = 0
+        self._entries: OrderedDict[str, tuple[float, int, tuple]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> tuple | None:
+        with self._lock:
+            if (entry := self._entries.get(key)) is None:
+                return None
+
+            expires_at, _, response_dict = entry
+            if expires_at <= time.monotonic():
+                self._pop(key=key)
+                return None
+
+            self._entries.move_to_end(key)
+            return response_dict
+
+    def set(self, key: str, response_dict: tuple, timeout: float) -> None:
+        content, _, headers, *_ = response_dict
+        size = sum(map(len, content)) if isinstance(content, list) else len(content)
+        size += sum(len(name) + len(value) for name, value in headers)
+        if size > self.max_size:
+            return
+
+        with self._lock:
+            self._pop(key=key)
+            self._entries[key] = (time.monotonic() + timeout, size, response_dict)
+            self.size += size
+
+            while self.size > self.max_size:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._pop(key=key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _pop(self, key: str) -> None:
+        if (entry := self._entries.pop(key, None)) is not None:
+            self.size -= entry[1]
+
+
+@functools.cache
+def get_local_cache() -> LocalCache:
+    return LocalCache(max_size=toolkit_api_settings.CACHE_LOCAL_MAX_SIZE)
+
+
+class CacheMetrics:
+    """Per view and action cache metrics, aggregated in-process"""
+
+    def __init__(self):
+        self._stats: dict[tuple[str, str], dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, view: str, action: str, **values: float) -> None:
+        with self._lock:
+            stats = self._stats.setdefault((view, action), {})
+            for name, value in values.items():
+                stats[name] = stats.get(name, 0) + value
+
+        if exporter := toolkit_api_settings.CACHE_METRICS_EXPORTER:
+            exporter(view=view, action=action, **values)
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            items = [(key, stats.copy()) for key, stats in self._stats.items()]
+
+        snapshot = {}
+        for (view, action), stats in sorted(items):
+            served = stats.get("hit", 0) + stats.get("stale", 0)
+            if requests := served + stats.get("miss", 0):
+                stats["hit_ratio"] = served / requests
+            for total, count in (
+                ("fill_time", "fills"),
+                ("rendered_size", "fills"),
+                ("get_time", "gets"),
+                ("set_time", "sets"),
+                ("size", "sets"),
+            ):
+                if stats.get(count):
+                    stats[f"avg_{total}"] = stats.get(total, 0) / stats[count]
+            snapshot[f"{view}.{action}"] = stats
+        return snapshot
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+@functools.cache
+def get_cache_metrics() -> CacheMetrics:
+    return CacheMetrics()
+
+
+def _get_codec(encoding: str) -> tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    match encoding:
+        case "gzip":
+            return functools.partial(gzip.compress, mtime=0), gzip.decompress
+        case "br":
+            try:
+                import brotli
+            except ImportError as exc:
+                raise ImproperlyConfigured("Brotli cache compression requires the `brotli` package") from exc
+            return brotli.compress, brotli.decompress
+        case "zstd":
+            try:
+                from compression import zstd
+            except ImportError:  # Python < 3.14
+                try:
+                    import zstandard as zstd
+                except ImportError as exc:
+                    raise ImproperlyConfigured("Zstandard cache compression requires the `zstandard` package") from exc
+            return zstd.compress, zstd.decompress
+    raise ImproperlyConfigured(f"Unsupported cache compression: {encoding}")
+
+
+def _accepts_encoding(request, encoding: str) -> bool:
+    qualities = {}
+    for accepted in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = accepted.partition(";")
+        quality = params.strip().removeprefix("q=")
+        try:
+            qualities.setdefault(coding.strip().lower(), not quality or float(quality) > 0)
+        except ValueError:
+            qualities.setdefault(coding.strip().lower(), False)
+
+    # The coding itself takes precedence over the wildcard, wherever they are listed
+    return qualities.get(encoding, qualities.get("*", False))
 
 
 class QueryListParamsKeyBit(bits.AllArgsMixin, bits.KeyBitDictBase):
@@ -15,29 +495,481 @@ class QueryListParamsKeyBit(bits.AllArgsMixin, bits.KeyBitDictBase):
         return data
 
 
+class CanonicalQueryParamsKeyBit(bits.KeyBitBase):
+    """Query parameters normalized so that equivalent requests share the same key:
+    - parameters not recognized by the view (e.g. tracking parameters) are ignored
+    - values of multiple-choice filters are sorted
+    - filters' initial values and pagination defaults are the same as missing parameters
+    - sparse fieldsets are the same regardless of the order of the fields
+    """
+
+    paginator_attrs = bits.PaginationKeyBit.paginator_attrs
+
+    def __init__(self, params=None):
+        super().__init__(params=params)
+        self._view_params = {}
+
+    def get_data(self, params, view_instance, view_method, request, args, kwargs):
+        filters, known_params = self._resolve_view_params(
+            view_instance=view_instance, view_method=view_method, request=request
+        )
+        sparse_params = _get_sparse_params(view_instance=view_instance)
+
+        data = {}
+        for name in known_params:
+            values = [value for value in request.query_params.getlist(name) if value != ""]
+            filter_obj = filters.get(name)
+
+            # Same as BaseFilterSet, missing parameters fall back to the filter's initial value
+            initial = filter_obj.extra.get("initial", None) if filter_obj else None
+            if not values and initial is not None:
+                if callable(initial):
+                    initial = initial(request=request)
+                values = initial if isinstance(initial, list | tuple) else [initial]
+                values = [str(value) for value in values]
+
+            if isinstance(filter_obj, MultipleChoiceFilter):
+                values = sorted(set(values))
+            elif name in sparse_params:
+                values = sorted({field.strip() for value in values for field in value.split(",")} - {""})
+
+            if values:
+                data[name] = values
+
+        paginator = getattr(view_instance, "paginator", None)
+        page_query_param = getattr(paginator, "page_query_param", None)
+        if data.get(page_query_param) == [str(getattr(paginator, "page_start", 1))]:
+            del data[page_query_param]
+        page_size_query_param = getattr(paginator, "page_size_query_param", None)
+        if data.get(page_size_query_param) == [str(getattr(paginator, "page_size", None))]:
+            del data[page_size_query_param]
+
+        data["renderer_type"] = request.accepted_media_type
+        return data
+
+    def _resolve_view_params(self, view_instance, view_method, request) -> tuple[dict, list[str]]:
+        try:
+            return self._get_view_params(view_instance=view_instance, view_method=view_method)
+        except SynchronousOnlyOperation:
+            raise
+        except Exception:
+            # Without the filterset, any parameter could be a filter: all of them are kept
+            logger.warning(f"Unable to resolve the filters of {view_instance.__class__.__name__}", exc_info=True)
+            return {}, sorted(set(request.query_params))
+
+    def _get_view_params(self, view_instance, view_method) -> tuple[dict, list[str]]:
+        view_key = (view_instance.__class__, view_method.__name__)
+        if view_key in self._view_params:
+            return self._view_params[view_key]
+
+        filterset_class = _get_view_filterset_class(view_instance=view_instance)
+        all_filters = filterset_class.base_filters if filterset_class else {}
+
+        known_params = set(getattr(view_instance, "cache_query_params", ()))
+        for name, filter_obj in all_filters.items():
+            widget = filter_obj.extra.get("widget") or getattr(filter_obj.field_class, "widget", None)
+            suffixes = getattr(widget, "suffixes", None) or [None]
+            known_params.update(f"{name}_{suffix}" if suffix else name for suffix in suffixes)
+
+        for backend_class in getattr(view_instance, "filter_backends", []):
+            for attr in ("search_param", "ordering_param"):
+                if param := getattr(backend_class, attr, None):
+                    known_params.add(param)
+
+        paginator = getattr(view_instance, "paginator", None)
+        for attr in self.paginator_attrs:
+            if param := getattr(paginator, attr, None):
+                known_params.add(param)
+
+        if format_param := api_settings.URL_FORMAT_OVERRIDE:
+            known_params.add(format_param)
+
+        known_params.update(_get_sparse_params(view_instance=view_instance))
+
+        # Only multiple-choice filters are order-insensitive,
+        # and only the toolkit's filtersets apply the filters' initial values
+        applies_initial = filterset_class is not None and issubclass(filterset_class, BaseFilterSet)
+        filters = {
+            name: filter_obj
+            for name, filter_obj in all_filters.items()
+            if isinstance(filter_obj, MultipleChoiceFilter) or (applies_initial and "initial" in filter_obj.extra)
+        }
+
+        self._view_params[view_key] = filters, sorted(known_params)
+        return self._view_params[view_key]
+
+
+def _get_sparse_params(view_instance) -> set[str]:
+    return {
+        param for attr in ("fields_query_param", "omit_query_param") if (param := getattr(view_instance, attr, None))
+    }
+
+
+def _get_view_filterset_class(view_instance):
+    # Errors resolving the queryset are left to the caller: the filterset is unknown, rather than missing
+    queryset = getattr(view_instance, "queryset", None)
+    if queryset is None:
+        queryset = view_instance.get_queryset()
+
+    for backend_class in getattr(view_instance, "filter_backends", []):
+        backend = backend_class()
+        if hasattr(backend, "get_filterset_class"):
+            return backend.get_filterset_class(view_instance, queryset)
+    return None
+
+
+def _get_view_model(view_instance) -> type[Model] | None:
+    # Views not backed by a model (e.g. a plain APIView) have neither generation nor tags
+    queryset = getattr(view_instance, "queryset", None)
+    get_queryset = getattr(type(view_instance), "get_queryset", GenericAPIView.get_queryset)
+    if queryset is None and get_queryset is not GenericAPIView.get_queryset:
+        queryset = view_instance.get_queryset()
+    return getattr(queryset, "model", None)
+
+
+class ModelGenerationKeyBit(bits.KeyBitBase):
+    def get_data(self, params, view_instance, view_method, request, args, kwargs):
+        if (model := _get_view_model(view_instance=view_instance)) is None:
+            return None
+        return get_model_generation(model=model)
+
+
+def _get_class_path(klass: type) -> str:
+    return f"{klass.__module__}.{klass.__qualname__}"
+
+
+def _describe_field(field) -> list:
+    description = [_get_class_path(type(field)), field.source]
+    if (child := getattr(field, "child", None)) is not None:
+        description.append(_describe_field(field=child))
+    if isinstance(field, serializers.Serializer):
+        description.append(
+            {name: _describe_field(field=nested) for name, nested in field.fields.items() if not nested.write_only}
+        )
+    return description
+
+
+class SchemaKeyBit(bits.KeyBitBase):
+    """Fingerprint of what shapes the response: the serializers' fields, the filterset's filters and the renderers.
+
+    Entries cached before a deploy changing any of them are simply not reached anymore,
+    while the endpoints that didn't change keep their entries.
+    """
+
+    def __init__(self, params=None):
+        super().__init__(params=params)
+        self._fingerprints = {}
+
+    def get_data(self, params, view_instance, view_method, request, args, kwargs):
+        # Serializers may depend on the request (e.g. with stats), so each set of them has its own fingerprint
+        serializer_classes = self.get_serializer_classes(view_instance=view_instance)
+        view_key = (view_instance.__class__, view_method.__name__, serializer_classes)
+        if view_key not in self._fingerprints:
+            schema = self.get_schema(view_instance=view_instance, serializer_classes=serializer_classes)
+            schema = json.dumps(schema, sort_keys=True, default=str)
+            self._fingerprints[view_key] = hashlib.blake2b(schema.encode(), digest_size=8).hexdigest()
+        return self._fingerprints[view_key]
+
+    def get_serializer_classes(self, view_instance) -> tuple[type, ...]:
+        serializer_classes = set()
+        for getter in ("get_serializer_class", "get_response_serializer_class"):
+            if hasattr(view_instance, getter):
+                serializer_classes.add(getattr(view_instance, getter)())
+        return tuple(sorted(serializer_classes, key=_get_class_path))
+
+    def get_schema(self, view_instance, serializer_classes) -> dict:
+        schema = {
+            "serializers": {
+                _get_class_path(serializer_class): _describe_field(
+                    field=serializer_class(context=view_instance.get_serializer_context())
+                )
+                for serializer_class in serializer_classes
+            },
+            "renderers": [_get_class_path(renderer_class) for renderer_class in view_instance.renderer_classes],
+        }
+        try:
+            filterset_class = _get_view_filterset_class(view_instance=view_instance)
+        except SynchronousOnlyOperation:
+            raise
+        except Exception:
+            # The view itself will fail the same way
+            filterset_class = None
+        if filterset_class:
+            schema["filters"] = {
+                name: [_get_class_path(type(filter_obj)), filter_obj.field_name, filter_obj.lookup_expr]
+                for name, filter_obj in filterset_class.base_filters.items()
+            }
+        return schema
+
+
+class PartitionKeyBit(bits.KeyBitBase):
+    """Partitions the cache by who is asking, as named by `partition_func(request)`.
+
+    Each partition has its own generation, so all of its entries can be invalidated at once
+    with `bump_partition_generation`.
+    """
+
+    def __init__(self, partition_func: Callable | None = None, params=None):
+        super().__init__(params=params)
+        self.partition_func = partition_func
+
+    def get_partitions(self, request) -> list[str]:
+        partition = self.partition_func(request)
+        if partition is None:
+            return []
+        if isinstance(partition, str):
+            return [partition]
+        return sorted(partition)
+
+    def get_data(self, params, view_instance, view_method, request, args, kwargs):
+        return [
+            (partition, get_partition_generation(partition=partition))
+            for partition in self.get_partitions(request=request)
+        ]
+
+
+class UserPartitionKeyBit(PartitionKeyBit):
+    def get_partitions(self, request) -> list[str]:
+        user = request.user
+        if not user or not user.is_authenticated:
+            return ["user:anonymous"]
+        return [f"user:{user.pk}"]
+
+
+class GroupPartitionKeyBit(PartitionKeyBit):
+    def get_partitions(self, request) -> list[str]:
+        user = request.user
+        if not user or not user.is_authenticated:
+            return ["group:anonymous"]
+        return [f"group:{pk}" for pk in sorted(user.groups.values_list("pk", flat=True))] or ["group:none"]
+
+
+class ViewPartitionKeyBit(bits.KeyBitBase):
+    """Partitions of the view's `cache_key_constructor`, so that the actions keyed otherwise (e.g. search)
+    are partitioned the same way as the others.
+    """
+
+    def get_data(self, params, view_instance, view_method, request, args, kwargs):
+        key_func = getattr(view_instance, "cache_key_constructor", None)
+        return {
+            name: bit.get_data(
+                params=None,
+                view_instance=view_instance,
+                view_method=view_method,
+                request=request,
+                args=args,
+                kwargs=kwargs,
+            )
+            for name, bit in getattr(key_func, "bits", {}).items()
+            if isinstance(bit, PartitionKeyBit)
+        }
+
+
 class CacheKeyConstructor(KeyConstructor):
     unique_view_id = bits.UniqueMethodIdKeyBit()
     args = bits.ArgsKeyBit()
     kwargs = bits.KwargsKeyBit()
     all_query_params = QueryListParamsKeyBit()
+    model_generation = ModelGenerationKeyBit()
+    schema = SchemaKeyBit()
 
 
 cache_key_constructor = CacheKeyConstructor()
 
 
+class UserCacheKeyConstructor(CacheKeyConstructor):
+    partition = UserPartitionKeyBit()
+
+
+user_cache_key_constructor = UserCacheKeyConstructor()
+
+
+class GroupCacheKeyConstructor(CacheKeyConstructor):
+    partition = GroupPartitionKeyBit()
+
+
+group_cache_key_constructor = GroupCacheKeyConstructor()
+
+
+class CanonicalCacheKeyConstructor(CacheKeyConstructor):
+    all_query_params = CanonicalQueryParamsKeyBit()
+
+
+canonical_cache_key_constructor = CanonicalCacheKeyConstructor()
+
+
 class BodyKeyBit(bits.AllArgsMixin, bits.KeyBitDictBase):
     def get_source_dict(self, params, view_instance, view_method, request, args, kwargs):
         return request.data
 
 
+class CanonicalBodyKeyBit(CanonicalQueryParamsKeyBit):
+    """Request body normalized to the same form FilterInBodyBackend gives to the filterset, and hashed:
+    - values are coerced to lists of strings, as in query parameters (except for null)
+    - values of multiple-choice filters are sorted
+    """
+
+    def get_data(self, params, view_instance, view_method, request, args, kwargs):
+        body = request.data
+        if isinstance(body, QueryDict):
+            body = {key: body.getlist(key) for key in body}
+
+        if isinstance(body, dict):
+            filters, _ = self._resolve_view_params(
+                view_instance=view_instance, view_method=view_method, request=request
+            )
+
+            data = {}
+            for key, value in body.items():
+                values = [_as_query_value(value=item) for item in (value if isinstance(value, list) else [value])]
+                if isinstance(filters.get(key), MultipleChoiceFilter):
+                    values = sorted(set(values), key=lambda item: (item is not None, item or ""))
+                data[key] = values
+        else:
+            data = body
+
+        serialized = json.dumps(data, sort_keys=True, default=str).encode()
+        return hashlib.blake2b(serialized, digest_size=16).hexdigest()
+
+
+def _as_query_value(value) -> str | None:
+    # Unlike the string "None", null is given as is to the filterset
+    if value is None:
+        return None
+    if isinstance(value, dict | list):
+        return json.dumps(value, sort_keys=True, default=str)
+    return str(value)
+
+
 class BodyCacheKeyConstructor(CacheKeyConstructor):
     body = BodyKeyBit()
+    partition = ViewPartitionKeyBit()
 
 
 body_cache_key_constructor = BodyCacheKeyConstructor()
 
 
+class CanonicalBodyCacheKeyConstructor(CacheKeyConstructor):
+    body = CanonicalBodyKeyBit()
+    partition = ViewPartitionKeyBit()
+
+
+canonical_body_cache_key_constructor = CanonicalBodyCacheKeyConstructor()
+
+
+# Options of `cache_response`, with the setting each one defaults to
+CACHE_RESPONSE_OPTIONS = {
+    "stale_timeout": "DEFAULT_CACHE_STALE_TIMEOUT",
+    "lock_timeout": "DEFAULT_CACHE_LOCK_TIMEOUT",
+    "compression": "DEFAULT_CACHE_COMPRESSION",
+    "local_timeout": "DEFAULT_CACHE_LOCAL_TIMEOUT",
+    "negative_timeout": "DEFAULT_CACHE_NEGATIVE_TIMEOUT",
+    "empty_timeout": "DEFAULT_CACHE_EMPTY_TIMEOUT",
+    "ttl_jitter": "DEFAULT_CACHE_TTL_JITTER",
+    "early_refresh": "DEFAULT_CACHE_EARLY_REFRESH",
+    "availability_expiry": "DEFAULT_CACHE_AVAILABILITY_EXPIRY",
+}
+
+
 class CacheResponse(decorators.CacheResponse):
+    def __init__(self, *args, cache=None, **kwargs):
+        options = {name: kwargs.pop(name, None) for name in CACHE_RESPONSE_OPTIONS}
+        super().__init__(*args, cache=cache, **kwargs)
+        self._threaded_key_funcs = set()
+        # Locks are looked up through a proxy, so backends (or tests) can provide `cache.lock`
+        self.lock_cache = ConnectionProxy(caches, cache or extensions_api_settings.DEFAULT_USE_CACHE)
+
+        for name, setting in CACHE_RESPONSE_OPTIONS.items():
+            value = options[name]
+            setattr(self, name, getattr(toolkit_api_settings, setting) if value is None else value)
+
+    def _calculate_view_option(self, value, view_instance, literals=()):
+        if isinstance(value, str) and value not in literals:
+            return getattr(view_instance, value)
+        return value
+
+    def calculate_stale_timeout(self, view_instance):
+        return self._calculate_view_option(value=self.stale_timeout, view_instance=view_instance)
+
+    def calculate_lock_timeout(self, view_instance):
+        return self._calculate_view_option(value=self.lock_timeout, view_instance=view_instance)
+
+    def calculate_compression(self, view_instance):
+        return self._calculate_view_option(
+            value=self.compression, view_instance=view_instance, literals=COMPRESSION_ENCODINGS
+        )
+
+    def calculate_local_timeout(self, view_instance):
+        return self._calculate_view_option(value=self.local_timeout, view_instance=view_instance)
+
+    def calculate_negative_timeout(self, view_instance):
+        return self._calculate_view_option(value=self.negative_timeout, view_instance=view_instance)
+
+    def calculate_empty_timeout(self, view_instance):
+        return self._calculate_view_option(value=self.empty_timeout, view_instance=view_instance)
+
+    def calculate_ttl_jitter(self, view_instance):
+        return self._calculate_view_option(value=self.ttl_jitter, view_instance=view_instance)
+
+    def calculate_early_refresh(self, view_instance):
+        return self._calculate_view_option(value=self.early_refresh, view_instance=view_instance)
+
+    def calculate_availability_expiry(self, view_instance):
+        return self._calculate_view_option(
+            value=self.availability_expiry, view_instance=view_instance, literals=AVAILABILITY_EXPIRY_MODES
+        )
+
+    def calculate_next_transition(self, view_instance, now) -> datetime | None:
+        # Availability models change what is current as their rows start and end, regardless of writes
+        match self.calculate_availability_expiry(view_instance=view_instance):
+            case "model":
+                model = _get_view_model(view_instance=view_instance)
+                manager = getattr(model, "_default_manager", None)
+                if hasattr(manager, "next_transition"):
+                    return manager.next_transition(at=now)
+            case "instances":
+                instances = getattr(view_instance, "cached_instances", None)
+                if isinstance(instances, Model):
+                    instances = [instances]
+                transitions = [getattr(instance, "next_transition", None) for instance in instances or []]
+                return min((dt for dt in transitions if dt is not None), default=None)
+        return None
+
+    def calculate_entry_timeout(self, view_instance, response) -> int:
+        if response.status_code in NEGATIVE_STATUS_CODES and (
+            negative_timeout := self.calculate_negative_timeout(view_instance=view_instance)
+        ):
+            return negative_timeout
+        if response.status_code >= status.HTTP_400_BAD_REQUEST and not self.cache_errors:
+            return 0
+        if _is_empty(response=response) and (
+            empty_timeout := self.calculate_empty_timeout(view_instance=view_instance)
+        ):
+            return empty_timeout
+        return self.timeout
+
+    def record_metrics(self, view_instance, view_method, **values):
+        if toolkit_api_settings.CACHE_METRICS_ENABLED:
+            get_cache_metrics().record(view=view_instance.__class__.__name__, action=view_method.__name__, **values)
+
+    def __call__(self, func):
+        if not inspect.iscoroutinefunction(func):
+            return super().__call__(func)
+
+        this = self
+
+        @wraps(func, assigned=WRAPPER_ASSIGNMENTS)
+        async def inner(self, request, *args, **kwargs):
+            return await this.aprocess_cache_response(
+                view_instance=self,
+                view_method=func,
+                request=request,
+                args=args,
+                kwargs=kwargs,
+            )
+
+        return inner
+
     def process_cache_response(
         self,
         view_instance,
@@ -54,51 +986,521 @@ class CacheResponse(decorators.CacheResponse):
             kwargs=kwargs,
         )
 
-        cache_control = request.headers.get("cache-control", "default").split(",")
+        cache_control = _parse_cache_control(header=request.headers.get("cache-control", ""))
+        if_none_match = request.headers.get("if-none-match") if request.method in ("GET", "HEAD") else None
+        max_age = _parse_max_age(cache_control=cache_control)
 
-        # TODO: accept and handler others directives, such as: no-store, must-revalidate
-        if "no-cache" in cache_control:
-            valid_cache_control = True
+        metrics = {}
+        valid_cache_control = "no-cache" in cache_control
+        store = "no-store" not in cache_control
+
+        if valid_cache_control or not store:
             response_dict = None
         else:
-            valid_cache_control = False
-            response_dict = self.cache.get(key)
+            started = time.perf_counter()
+            # A matching ETag is enough to answer, without even fetching the cached content,
+            # unless the content must be checked against its tags
+            etag = (
+                _fresh_etag(value=self.cache.get(f"{key}:etag"))
+                if self.should_precheck_etag(view_instance=view_instance, if_none_match=if_none_match, max_age=max_age)
+                else None
+            )
+            if _etag_matches(etag=etag, if_none_match=if_none_match):
+                self.record_metrics(view_instance, view_method, hit=1, gets=1, get_time=time.perf_counter() - started)
+                return self.finalize_cached_response(response=_not_modified(etag=etag), cache_status="HIT")
+            response_dict, cache_tier = self.get_cached_response(key=key, view_instance=view_instance)
+            metrics.update(gets=1, get_time=time.perf_counter() - started)
+
+            if response_dict and cache_tier == "local" and not _tags_valid(response_dict=response_dict):
+                # Outdated in this process only, as another worker may have rebuilt the shared entry already
+                get_local_cache().delete(key)
+                response_dict, cache_tier = self.get_cached_response(key=key, view_instance=view_instance)
+
+            if response_dict and not _tags_valid(response_dict=response_dict):
+                # Removed, so that workers waiting for a rebuild don't pick it up again
+                self.cache.delete_many([key, f"{key}:etag"])
+                get_local_cache().delete(key)
+                response_dict = None
+
+            if response_dict and _is_too_old(response_dict=response_dict, max_age=max_age):
+                # Too old for this client, but still fresh for everyone else
+                response_dict, valid_cache_control = None, True
 
         if not response_dict:
-            response = view_method(view_instance, request, *args, **kwargs)
-            response = view_instance.finalize_response(request, response, *args, **kwargs)
-            response.render()
-
-            if not response.status_code >= 400 or self.cache_errors:
-                expiration_date = now() + timedelta(seconds=self.timeout)
-                response["Expires"] = handlers.format_date_time(expiration_date.timestamp())
-                if valid_cache_control and cache_control:
-                    response["Cache-Control"] = f"max-age={self.timeout}"
-
-                response_dict = (
-                    response.rendered_content,
-                    response.status_code,
-                    response.headers.copy(),
+            response, cache_status = self.fill_missing_response(
+                key=key,
+                view_instance=view_instance,
+                view_method=view_method,
+                request=request,
+                args=args,
+                kwargs=kwargs,
+                cache_control=cache_control,
+                with_cache_control=valid_cache_control,
+                store=store,
+            )
+        else:
+            response, meta = self.load_cached_response(response_dict=response_dict, request=request)
+            cache_status, refresh = self.get_refresh_status(view_instance=view_instance, meta=meta)
+            if refresh:
+                self.schedule_refresh(
+                    key=key,
+                    view_instance=view_instance,
+                    view_method=view_method,
+                    request=request,
+                    args=args,
+                    kwargs=kwargs,
                 )
+            response["X-Cache-Tier"] = cache_tier
+
+        return self.complete_cached_response(
+            response=response,
+            cache_status=cache_status,
+            if_none_match=if_none_match,
+            view_instance=view_instance,
+            view_method=view_method,
+            metrics=metrics,
+        )
+
+    async def aprocess_cache_response(
+        self,
+        view_instance,
+        view_method,
+        request,
+        args,
+        kwargs,
+    ):
+        # Same as `process_cache_response`, but cache hits are served without leaving the event loop
+        key = await self.acalculate_key(
+            view_instance=view_instance,
+            view_method=view_method,
+            request=request,
+            args=args,
+            kwargs=kwargs,
+        )
 
-                self.cache.set(key, response_dict, self.timeout)
-            cache_hit = False
+        cache_control = _parse_cache_control(header=request.headers.get("cache-control", ""))
+        if_none_match = request.headers.get("if-none-match") if request.method in ("GET", "HEAD") else None
+        max_age = _parse_max_age(cache_control=cache_control)
+
+        metrics = {}
+        valid_cache_control = "no-cache" in cache_control
+        store = "no-store" not in cache_control
+
+        if valid_cache_control or not store:
+            response_dict = None
         else:
+            started = time.perf_counter()
+            etag = (
+                _fresh_etag(value=await self.cache.aget(f"{key}:etag"))
+                if self.should_precheck_etag(view_instance=view_instance, if_none_match=if_none_match, max_age=max_age)
+                else None
+            )
+            if _etag_matches(etag=etag, if_none_match=if_none_match):
+                self.record_metrics(view_instance, view_method, hit=1, gets=1, get_time=time.perf_counter() - started)
+                return self.finalize_cached_response(response=_not_modified(etag=etag), cache_status="HIT")
+            response_dict, cache_tier = await self.aget_cached_response(key=key, view_instance=view_instance)
+            metrics.update(gets=1, get_time=time.perf_counter() - started)
+
+            if response_dict and cache_tier == "local" and not await _atags_valid(response_dict=response_dict):
+                get_local_cache().delete(key)
+                response_dict, cache_tier = await self.aget_cached_response(key=key, view_instance=view_instance)
+
+            if response_dict and not await _atags_valid(response_dict=response_dict):
+                await self.cache.adelete_many([key, f"{key}:etag"])
+                get_local_cache().delete(key)
+                response_dict = None
+
+            if response_dict and _is_too_old(response_dict=response_dict, max_age=max_age):
+                response_dict, valid_cache_control = None, True
+
+        if not response_dict:
+            # Rebuilding runs the view in a thread anyway, along with the locks and writes around it
+            response, cache_status = await sync_to_async(self.fill_missing_response)(
+                key=key,
+                view_instance=view_instance,
+                view_method=view_method,
+                request=request,
+                args=args,
+                kwargs=kwargs,
+                cache_control=cache_control,
+                with_cache_control=valid_cache_control,
+                store=store,
+            )
+        else:
+            response, meta = self.load_cached_response(response_dict=response_dict, request=request)
+            cache_status, refresh = self.get_refresh_status(view_instance=view_instance, meta=meta)
+            if refresh:
+                await self.aschedule_refresh(
+                    key=key,
+                    view_instance=view_instance,
+                    view_method=view_method,
+                    request=request,
+                    args=args,
+                    kwargs=kwargs,
+                )
+            response["X-Cache-Tier"] = cache_tier
+
+        return self.complete_cached_response(
+            response=response,
+            cache_status=cache_status,
+            if_none_match=if_none_match,
+            view_instance=view_instance,
+            view_method=view_method,
+            metrics=metrics,
+        )
+
+    async def acalculate_key(self, view_instance, view_method, request, args, kwargs):
+        # Key bits reading the database (e.g. the user's groups) can only run in a thread, which is remembered
+        # per key function, so that the keys of the others are still computed on the event loop
+        key_func = getattr(view_instance, self.key_func) if isinstance(self.key_func, str) else self.key_func
+        if key_func not in self._threaded_key_funcs:
             try:
-                content, status, headers = response_dict
-                response = HttpResponse(content=content, status=status)
-                response.headers = headers
-            except ValueError:
-                response = response_dict
+                return self.calculate_key(
+                    view_instance=view_instance,
+                    view_method=view_method,
+                    request=request,
+                    args=args,
+                    kwargs=kwargs,
+                )
+            except SynchronousOnlyOperation:
+                self._threaded_key_funcs.add(key_func)
+        return await sync_to_async(self.calculate_key)(
+            view_instance=view_instance,
+            view_method=view_method,
+            request=request,
+            args=args,
+            kwargs=kwargs,
+        )
 
-            cache_hit = True
+    def should_precheck_etag(self, view_instance, if_none_match, max_age) -> bool:
+        return bool(if_none_match and max_age is None and not is_tagged_model(model=_get_view_model(view_instance)))
 
-        response["X-Cache"] = "HIT" if cache_hit else "MISS"
+    def fill_missing_response(
+        self,
+        key,
+        view_instance,
+        view_method,
+        request,
+        args,
+        kwargs,
+        cache_control,
+        with_cache_control,
+        store,
+    ):
+        fill_kwargs = {
+            "key": key,
+            "view_instance": view_instance,
+            "view_method": view_method,
+            "request": request,
+            "args": args,
+            "kwargs": kwargs,
+            "with_cache_control": with_cache_control,
+            "store": store,
+        }
+        if "only-if-cached" in cache_control:
+            return _gateway_timeout(), "MISS"
+        if (
+            not with_cache_control
+            and store
+            and (lock_timeout := self.calculate_lock_timeout(view_instance=view_instance))
+        ):
+            return self.fill_cache_single_flight(lock_timeout=lock_timeout, **fill_kwargs)
+        return self.fill_cache(**fill_kwargs), "MISS"
+
+    def get_refresh_status(self, view_instance, meta) -> tuple[str, bool]:
+        now = timezone.now().timestamp()
+        stale_at = meta.get("stale_at")
+        if stale_at is not None and stale_at <= now:
+            return "STALE", True
+        return "HIT", _should_refresh_early(
+            meta=meta, now=now, beta=self.calculate_early_refresh(view_instance=view_instance)
+        )
+
+    def complete_cached_response(self, response, cache_status, if_none_match, view_instance, view_method, metrics):
+        etag = response.get("ETag")
+        if response.status_code == status.HTTP_200_OK and _etag_matches(etag=etag, if_none_match=if_none_match):
+            response = _not_modified(etag=etag)
+
+        self.record_metrics(view_instance, view_method, **{cache_status.lower(): 1}, **metrics)
+        return self.finalize_cached_response(response=response, cache_status=cache_status)
+
+    def finalize_cached_response(self, response, cache_status):
+        response["X-Cache"] = cache_status
 
         if not hasattr(response, "_closable_objects"):
             response._closable_objects = []
 
         return response
 
+    def fill_cache(
+        self,
+        key,
+        view_instance,
+        view_method,
+        request,
+        args,
+        kwargs,
+        with_cache_control=False,
+        store=True,
+    ):
+        # Read before the view, so writes happening while it runs invalidate the entry
+        model = _get_view_model(view_instance=view_instance)
+        tagged_at = _get_generation(key=TAG_CLOCK_KEY) if is_tagged_model(model=model) else None
+
+        started = time.perf_counter()
+        # Async views are rebuilt from the worker threads as well
+        handler = async_to_sync(view_method) if inspect.iscoroutinefunction(view_method) else view_method
+        try:
+            response = handler(view_instance, request, *args, **kwargs)
+        except (Http404, NotFound) as exc:
+            if not self.calculate_negative_timeout(view_instance=view_instance):
+                raise
+            # Handled here instead of by the view, so the error response can be cached
+            response = view_instance.handle_exception(exc)
+        response = view_instance.finalize_response(request, response, *args, **kwargs)
+        response.render()
+        fill_time = time.perf_counter() - started
+        self.record_metrics(
+            view_instance,
+            view_method,
+            fills=1,
+            fill_time=fill_time,
+            rendered_size=len(response.rendered_content),
+        )
+
+        if entry_timeout := self.calculate_entry_timeout(view_instance=view_instance, response=response):
+            regular = entry_timeout == self.timeout
+            if jitter := self.calculate_ttl_jitter(view_instance=view_instance):
+                # Entries filled together don't expire together
+                entry_timeout = max(1, round(entry_timeout * (1 - random.uniform(0, jitter))))
+
+            now = timezone.now()
+            if (transition := self.calculate_next_transition(view_instance=view_instance, now=now)) is not None:
+                remaining = max(1, math.ceil((transition - now).total_seconds()))
+                if remaining < entry_timeout:
+                    # Not served stale either, since the content is outdated right at the transition
+                    entry_timeout, regular = remaining, False
+
+            expiration_date = now + timedelta(seconds=entry_timeout)
+            response["Expires"] = handlers.format_date_time(expiration_date.timestamp())
+            if with_cache_control:
+                response["Cache-Control"] = f"max-age={entry_timeout}"
+
+            timeout = entry_timeout
+            meta = {"created_at": now.timestamp()}
+            if regular and (stale_timeout := self.calculate_stale_timeout(view_instance=view_instance)):
+                # Keep the entry around after it expires, so it can be served while being refreshed
+                meta["stale_at"] = expiration_date.timestamp()
+                timeout += stale_timeout
+            if self.calculate_early_refresh(view_instance=view_instance):
+                meta["expires_at"] = expiration_date.timestamp()
+                meta["fill_time"] = fill_time
+
+            etag = response.get("ETag") or _calculate_etag(content=response.rendered_content)
+            response["ETag"] = etag
+            if not store:
+                return response
+
+            if tagged_at is not None and (instances := getattr(view_instance, "cached_instances", None)) is not None:
+                meta["tags"] = _get_instances_tags(model=model, instances=instances)
+                meta["tagged_at"] = tagged_at
+
+            content = response.rendered_content
+            encoding = self.calculate_compression(view_instance=view_instance)
+            if encoding and len(content) >= toolkit_api_settings.CACHE_COMPRESSION_MIN_SIZE:
+                compress, _ = _get_codec(encoding=encoding)
+                content = compress(content)
+                meta["encoding"] = encoding
+
+            if (max_size := toolkit_api_settings.CACHE_MAX_ENTRY_SIZE) and len(content) > max_size:
+                logger.info(f"Cache entry {key} has {len(content)} bytes, above the maximum of {max_size}")
+                return response
+
+            headers = [(name, value) for name, value in response.items() if name.lower() not in UNCACHED_HEADERS]
+            entries = {f"{key}:etag": (etag, meta.get("stale_at", meta.get("expires_at")))}
+
+            chunk_size = toolkit_api_settings.CACHE_CHUNK_SIZE
+            if chunk_size and len(content) > chunk_size:
+                # Each fill writes its own chunks, so concurrent fills never mix them up
+                meta["chunks"] = {"id": uuid.uuid4().hex, "count": math.ceil(len(content) / chunk_size)}
+                chunks = [content[start : start + chunk_size] for start in range(0, len(content), chunk_size)]
+                entries.update(zip(_get_chunk_keys(key=key, chunks=meta["chunks"]), chunks, strict=True))
+                entries[key] = _encode_entry(b"", response.status_code, headers, meta)
+                response_dict = (chunks, response.status_code, headers, meta)
+            else:
+                response_dict = (content, response.status_code, headers, meta)
+                entries[key] = _encode_entry(*response_dict)
+
+            started = time.perf_counter()
+            self.cache.set_many(entries, timeout)
+            self.record_metrics(
+                view_instance, view_method, sets=1, set_time=time.perf_counter() - started, size=len(content)
+            )
+            if local_timeout := self.calculate_local_timeout(view_instance=view_instance):
+                get_local_cache().set(key, response_dict, timeout=min(timeout, local_timeout))
+        return response
+
+    def get_cached_response(self, key, view_instance):
+        local_timeout = self.calculate_local_timeout(view_instance=view_instance)
+        if local_timeout and (response_dict := get_local_cache().get(key)):
+            return response_dict, "local"
+
+        response_dict = self.read_entry(key=key)
+        if local_timeout and response_dict and not isinstance(response_dict, HttpResponseBase):
+            get_local_cache().set(key, response_dict, timeout=local_timeout)
+        return response_dict, "shared"
+
+    async def aget_cached_response(self, key, view_instance):
+        local_timeout = self.calculate_local_timeout(view_instance=view_instance)
+        if local_timeout and (response_dict := get_local_cache().get(key)):
+            return response_dict, "local"
+
+        response_dict = await self.aread_entry(key=key)
+        if local_timeout and response_dict and not isinstance(response_dict, HttpResponseBase):
+            get_local_cache().set(key, response_dict, timeout=local_timeout)
+        return response_dict, "shared"
+
+    def read_entry(self, key):
+        response_dict = _decode_entry(entry=self.cache.get(key))
+        if not response_dict or isinstance(response_dict, HttpResponseBase):
+            return response_dict
+
+        if chunks := response_dict[3].get("chunks"):
+            chunk_keys = _get_chunk_keys(key=key, chunks=chunks)
+            return _join_chunks(
+                response_dict=response_dict, chunk_keys=chunk_keys, found=self.cache.get_many(chunk_keys)
+            )
+        return response_dict
+
+    async def aread_entry(self, key):
+        response_dict = _decode_entry(entry=await self.cache.aget(key))
+        if not response_dict or isinstance(response_dict, HttpResponseBase):
+            return response_dict
+
+        if chunks := response_dict[3].get("chunks"):
+            chunk_keys = _get_chunk_keys(key=key, chunks=chunks)
+            found = await self.cache.aget_many(chunk_keys)
+            return _join_chunks(response_dict=response_dict, chunk_keys=chunk_keys, found=found)
+        return response_dict
+
+    def fill_cache_single_flight(self, lock_timeout, **fill_kwargs):
+        # Only one worker rebuilds a missing entry, the others wait for it and re-read the cache
+        key = fill_kwargs["key"]
+        lock_key = f"{key}:lock"
+        unfilled_key = f"{key}:unfilled"
+
+        if hasattr(self.lock_cache, "lock"):
+            with ExitStack() as stack:
+                try:
+                    stack.enter_context(
+                        self.lock_cache.lock(lock_key, timeout=lock_timeout, blocking_timeout=lock_timeout)
+                    )
+                except Exception:
+                    logger.warning(f"Unable to lock cache entry {key} in time, rebuilding it anyway")
+
+                if response_dict := self.read_entry(key=key):
+                    return self.load_cached_response(response_dict=response_dict, request=fill_kwargs["request"])[
+                        0
+                    ], "HIT"
+                if self.cache.get(unfilled_key):
+                    # The previous worker didn't store anything either (e.g. an error),
+                    # so the others are not held while this one rebuilds it
+                    stack.close()
+                    return self.fill_cache(**fill_kwargs), "MISS"
+
+                try:
+                    return self.fill_cache(**fill_kwargs), "MISS"
+                finally:
+                    if not self.cache.has_key(key):
+                        self.cache.set(unfilled_key, True, lock_timeout)
+
+        if self.cache.add(lock_key, True, lock_timeout):
+            try:
+                return self.fill_cache(**fill_kwargs), "MISS"
+            finally:
+                self.cache.delete(lock_key)
+
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(toolkit_api_settings.CACHE_LOCK_POLL_INTERVAL)
+            # Checked before the entry, which is stored before the lock is released
+            released = self.cache.get(lock_key) is None
+            if response_dict := self.read_entry(key=key):
+                return self.load_cached_response(response_dict=response_dict, request=fill_kwargs["request"])[0], "HIT"
+            if released:
+                # The other worker is done, but didn't store anything (e.g. an error): no point in waiting any longer
+                return self.fill_cache(**fill_kwargs), "MISS"
+
+        logger.warning(f"Gave up waiting for cache entry {key}, rebuilding it anyway")
+        return self.fill_cache(**fill_kwargs), "MISS"
+
+    def load_cached_response(self, response_dict, request):
+        if isinstance(response_dict, HttpResponseBase):
+            # In older versions, the view cache is the whole response object
+            return response_dict, {}
+
+        content, status_code, headers, meta = response_dict
+
+        encoded = False
+        if encoding := meta.get("encoding"):
+            if _accepts_encoding(request=request, encoding=encoding):
+                encoded = True
+            else:
+                _, decompress = _get_codec(encoding=encoding)
+                content = decompress(b"".join(content) if isinstance(content, list) else content)
+
+        if isinstance(content, list):
+            # Chunked content is streamed as is, without joining it into a single buffer
+            response = StreamingHttpResponse(streaming_content=content, status=status_code)
+        else:
+            response = HttpResponse(content=content, status=status_code)
+        response.headers = ResponseHeaders(headers)
+        if encoded:
+            response["Content-Encoding"] = encoding
+            if etag := response.get("ETag"):
+                # The encoded content is not byte-for-byte the same representation
+                response["ETag"] = f"W/{etag.removeprefix('W/')}"
+        if (created_at := meta.get("created_at")) is not None:
+            response["Age"] = str(max(0, int(timezone.now().timestamp() - created_at)))
+        if encoding:
+            patch_vary_headers(response, ("Accept-Encoding",))
+        return response, meta
+
+    def schedule_refresh(self, key, view_instance, view_method, request, args, kwargs):
+        # Only one worker refreshes a stale entry, the others keep serving it meanwhile
+        marker_timeout = self.calculate_stale_timeout(view_instance=view_instance) or self.timeout
+        if not self.cache.add(f"{key}:refreshing", True, marker_timeout):
+            return None
+        return self.submit_refresh(
+            key=key, view_instance=view_instance, view_method=view_method, request=request, args=args, kwargs=kwargs
+        )
+
+    async def aschedule_refresh(self, key, view_instance, view_method, request, args, kwargs):
+        marker_timeout = self.calculate_stale_timeout(view_instance=view_instance) or self.timeout
+        if not await self.cache.aadd(f"{key}:refreshing", True, marker_timeout):
+            return None
+        return self.submit_refresh(
+            key=key, view_instance=view_instance, view_method=view_method, request=request, args=args, kwargs=kwargs
+        )
+
+    def submit_refresh(self, key, view_instance, view_method, request, args, kwargs):
+        def _refresh():
+            try:
+                self.fill_cache(
+                    key=key,
+                    view_instance=view_instance,
+                    view_method=view_method,
+                    request=request,
+                    args=args,
+                    kwargs=kwargs,
+                )
+            except Exception:
+                logger.exception(f"Failed to refresh stale cache entry {key}")
+            finally:
+                self.cache.delete(f"{key}:refreshing")
+                connections.close_all()
+
+        return _get_refresh_executor().submit(_refresh)
+
 
 cache_response = CacheResponse
@@ -0,0 +1,132 @@
+import json
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import RequestFactory
+from django.urls import URLResolver, get_resolver, resolve, reverse
+
+from drf_kit.settings import toolkit_api_settings
+from drf_kit.views.viewsets import CacheResponseMixin
+
+CACHED_ACTIONS = ("list", "retrieve")
+
+
+def _iter_patterns(patterns, namespace=None):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _iter_patterns(
+                patterns=pattern.url_patterns,
+                namespace=":".join(filter(None, [namespace, pattern.namespace])) or None,
+            )
+        else:
+            yield namespace, pattern
+
+
+class Command(BaseCommand):
+    help = "Fill the cache of cached viewsets by replaying list and retrieve requests"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--config", help="JSON file with the requests to replay, instead of CACHE_WARMUP")
+        parser.add_argument("--pages", type=int, default=1, help="List pages to request, unless configured per route")
+        parser.add_argument("--workers", type=int, default=4, help="Requests replayed in parallel")
+        parser.add_argument("--host", help="Host of the requests, as shown in pagination links")
+        parser.add_argument("--secure", action="store_true", help="Replay the requests as HTTPS")
+
+    def handle(self, *args, **options):
+        config = self.load_config(path=options["config"])
+        host = options["host"] or self.get_default_host()
+        factory = RequestFactory(HTTP_HOST=host)
+
+        requests = list(self.get_requests(config=config, pages=options["pages"]))
+
+        with ThreadPoolExecutor(max_workers=options["workers"], thread_name_prefix="drf-kit-cache-warmup") as executor:
+            results = executor.map(
+                lambda item: (item[0], item[1], self.replay(factory=factory, path=item[1], secure=options["secure"])),
+                requests,
+            )
+
+            timings = defaultdict(list)
+            for name, path, (status_code, cache_status, elapsed) in results:
+                timings[name].append(elapsed)
+                self.stdout.write(f"{name} GET {path} {status_code} {cache_status} {elapsed * 1000:.1f}ms")
+
+        for name, elapsed in timings.items():
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{name}: {len(elapsed)} requests, {sum(elapsed) * 1000:.1f}ms total, {max(elapsed) * 1000:.1f}ms max"
+                )
+            )
+
+    def load_config(self, path: str | None) -> dict:
+        if not path:
+            return toolkit_api_settings.CACHE_WARMUP
+        try:
+            return json.loads(Path(path).read_text())
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Unable to load cache warm-up config from {path}: {exc}") from exc
+
+    def get_default_host(self) -> str:
+        for host in settings.ALLOWED_HOSTS:
+            if host != "*" and not host.startswith("."):
+                return host
+        return "localhost"
+
+    def get_requests(self, config: dict, pages: int):
+        for namespace, pattern in _iter_patterns(patterns=get_resolver().url_patterns):
+            view_class = getattr(pattern.callback, "cls", None)
+            action = getattr(pattern.callback, "actions", {}).get("get")
+            if not (view_class and issubclass(view_class, CacheResponseMixin)) or action not in CACHED_ACTIONS:
+                continue
+
+            url_kwargs = set(pattern.pattern.regex.groupindex)
+            if "format" in url_kwargs or not pattern.name:
+                # Format suffixes are the same routes once more
+                continue
+
+            name = f"{namespace}:{pattern.name}" if namespace else pattern.name
+            route_config = config.get(pattern.name.rsplit("-", 1)[0], {})
+            route_kwargs = route_config.get("kwargs", {})
+
+            if action == "list":
+                if url_kwargs - set(route_kwargs):
+                    # Nested routes can only be requested for the configured parents
+                    continue
+                path = reverse(name, kwargs={key: route_kwargs[key] for key in url_kwargs})
+
+                pagination_class = view_class.pagination_class
+                page_query_param = getattr(pagination_class, "page_query_param", "page")
+                page_start = getattr(pagination_class, "page_start", 1)
+                route_pages = route_config.get("pages", pages) if pagination_class else 1
+
+                for filters in [{}, *route_config.get("filters", [])]:
+                    for page in range(route_pages):
+                        query = dict(filters)
+                        if page:
+                            query[page_query_param] = page_start + page
+                        yield name, f"{path}?{urlencode(query, doseq=True)}" if query else path
+            else:
+                lookup_url_kwarg = view_class.lookup_url_kwarg or view_class.lookup_field
+                if url_kwargs - {lookup_url_kwarg} - set(route_kwargs):
+                    continue
+                for pk in route_config.get("ids", []):
+                    kwargs = {key: route_kwargs.get(key) for key in url_kwargs} | {lookup_url_kwarg: pk}
+                    yield name, reverse(name, kwargs=kwargs)
+
+    def replay(self, factory: RequestFactory, path: str, secure: bool) -> tuple[int | str, str, float]:
+        started = time.perf_counter()
+        try:
+            request = factory.get(path, secure=secure)
+            match = resolve(request.path_info)
+            response = match.func(request, *match.args, **match.kwargs)
+            return response.status_code, response.get("X-Cache", "-"), time.perf_counter() - started
+        except Exception as exc:
+            self.stderr.write(f"GET {path} failed: {exc!r}")
+            return "ERROR", "-", time.perf_counter() - started
+        finally:
+            connections.close_all()
@@ -2,7 +2,7 @@ from dataclasses import dataclass
 from datetime import datetime
 
 from django.db import models
-from django.db.models import Q
+from django.db.models import Min, Q
 from django.utils import timezone
 
 
@@ -33,6 +33,13 @@ class AvailabilityChecker:
         not_ended = self.future_end or self.undefined_end
         return started & not_ended
 
+    @property
+    def next_transition(self) -> datetime | None:
+        transitions = [
+            dt for dt, future in ((self.starts_at, self.future_start), (self.ends_at, self.future_end)) if future
+        ]
+        return min(transitions, default=None)
+
     @property
     def undefined_start(self) -> bool:
         return self.starts_at is None
@@ -151,6 +158,15 @@ class AvailabilityManager(models.Manager):
     def future(self, at: datetime | None = None):
         return super().get_queryset().filter(AvailabilityFilters.future(dt=at))
 
+    def next_transition(self, at: datetime | None = None) -> datetime | None:
+        # Each lookup is answered by its index, instead of filtering within a single aggregate
+        queryset = super().get_queryset()
+        transitions = [
+            queryset.filter(AvailabilityFilters.future_start(dt=at)).aggregate(at=Min("starts_at"))["at"],
+            queryset.filter(AvailabilityFilters.future_end(dt=at)).aggregate(at=Min("ends_at"))["at"],
+        ]
+        return min((dt for dt in transitions if dt is not None), default=None)
+
     def same_availability_of(self, obj: "drf_kit.models.AvailabilityModel"):  # noqa: F821
         if not hasattr(obj, "starts_at") or not hasattr(obj, "ends_at"):
             raise TypeError(f"Expected AvailabilityModel, got {type(obj)}")
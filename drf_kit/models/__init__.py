@@ -1,6 +1,7 @@
 from drf_kit.managers import SoftDeleteAvailabilityManager, SoftDeleteOrderedManager
 from drf_kit.models.availability_models import AvailabilityModel, AvailabilityModelMixin
 from drf_kit.models.base_models import BaseModel
+from drf_kit.models.bulk_models import bulk_create, bulk_update, can_bulk_create, can_bulk_update
 from drf_kit.models.diff_models import ModelDiffMixin
 from drf_kit.models.file_models import BoundedFileMixin
 from drf_kit.models.inheritance_models import InheritanceModel, InheritanceModelMixin
@@ -58,4 +59,8 @@ __all__ = (
     "SoftDeleteInheritanceOrderedModel",
     "SoftDeleteModel",
     "SoftDeleteOrderedModel",
+    "bulk_create",
+    "bulk_update",
+    "can_bulk_create",
+    "can_bulk_update",
 )
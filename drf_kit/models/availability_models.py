@@ -1,4 +1,5 @@
 import logging
+from datetime import datetime
 
 from django.db import models
 from django.utils.translation import gettext as _
@@ -50,6 +51,10 @@ class AvailabilityModelMixin(models.Model):
     def is_current(self) -> bool:
         return self._availability_checker.is_current
 
+    @property
+    def next_transition(self) -> datetime | None:
+        return self._availability_checker.next_transition
+
     @property
     def _availability_checker(self) -> managers.AvailabilityChecker:
         return managers.AvailabilityChecker(starts_at=self.starts_at, ends_at=self.ends_at)
@@ -4,6 +4,7 @@ from django.db import models
 from django.urls import reverse
 from django.utils.translation import gettext as _
 
+from drf_kit.cache import track_model_generation
 from drf_kit.models.diff_models import ModelDiffMixin
 from drf_kit.models.file_models import BoundedFileMixin
 
@@ -22,6 +23,9 @@ class BaseModel(ModelDiffMixin, BoundedFileMixin, models.Model):
 
     objects = models.Manager()
 
+    # Updates invalidate only the cached entries containing the object, instead of every entry of the model
+    cache_object_tags = False
+
     class Meta:
         abstract = True
         ordering = ("-updated_at",)
@@ -30,6 +34,11 @@ class BaseModel(ModelDiffMixin, BoundedFileMixin, models.Model):
             models.Index(fields=["updated_at"]),
         ]
 
+    @classmethod
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        track_model_generation(model=cls)
+
     def __repr__(self):
         return f"<{self._meta.app_label}.{self.__class__.__name__} {self.pk}>"
 
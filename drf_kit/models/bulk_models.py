@@ -0,0 +1,103 @@
+import logging
+
+from django.db import models, transaction
+from ordered_model.models import OrderedModelBase
+
+from drf_kit.cache import bump_model_generation, invalidate_object_tags, is_tagged_model
+from drf_kit.models.diff_models import ModelDiffMixin
+from drf_kit.models.file_models import BoundedFileMixin
+from drf_kit.models.inheritance_models import InheritanceModelMixin, assert_inherited_types
+from drf_kit.models.ordered_models import OrderedModelMixin, assert_orders
+from drf_kit.models.soft_delete_models import SoftDeleteModelMixin, verify_soft_deletion
+
+logger = logging.getLogger(__name__)
+
+
+def can_bulk_create(model: type[models.Model]) -> bool:
+    # Multi-table inheritance spreads each object over several tables, which `bulk_create` doesn't support
+    return not model._meta.concrete_model._meta.get_parent_list()
+
+
+def can_bulk_update(model: type[models.Model]) -> bool:
+    # Moving an ordered object shifts its whole grouping, which only `save` takes care of
+    return not issubclass(model, OrderedModelMixin)
+
+
+def bulk_create(
+    model: type[models.Model], instances: list[models.Model], batch_size: int | None = None
+) -> list[models.Model]:
+    """Insert new objects with `bulk_create`, replicating in batch what the toolkit mixins do on `save`
+
+    Model signals are not sent, so receivers other than the toolkit's own are not called.
+    """
+    if not instances:
+        return instances
+
+    with transaction.atomic():
+        if issubclass(model, InheritanceModelMixin):
+            assert_inherited_types(instances)
+        queryset = model._default_manager.all()
+        if issubclass(model, OrderedModelMixin):
+            assert_orders(instances)
+            # django-ordered-model's own `bulk_create` would append every object, discarding their orders
+            queryset = models.QuerySet(model=model)
+
+        queryset.bulk_create(instances, batch_size=batch_size)
+
+        if issubclass(model, BoundedFileMixin) and (bound := [obj for obj in instances if obj._bind_files()]):
+            file_fields = [field.name for field in model._meta.concrete_fields if isinstance(field, models.FileField)]
+            model._base_manager.bulk_update(bound, fields=file_fields, batch_size=batch_size)
+
+    for instance in instances:
+        if isinstance(instance, OrderedModelBase):
+            instance._original_wrt_map = instance._wrt_map()
+        if isinstance(instance, ModelDiffMixin):
+            instance._initial = instance._dict
+
+    bump_model_generation(model=model)
+    return instances
+
+
+def bulk_update(
+    model: type[models.Model],
+    instances: list[models.Model],
+    fields: list[str] | None = None,
+    batch_size: int | None = None,
+) -> list[models.Model]:
+    """Write the changes of existing objects with `bulk_update`, replicating in batch what the toolkit mixins do on `save`
+
+    Only the `fields` are written, which default to every field changed in any of the objects, see `ModelDiffMixin`.
+    Model signals are not sent, so receivers other than the toolkit's own are not called.
+    """
+    if not instances:
+        return instances
+
+    if issubclass(model, SoftDeleteModelMixin):
+        for instance in instances:
+            verify_soft_deletion(sender=model, instance=instance)
+    if issubclass(model, InheritanceModelMixin):
+        assert_inherited_types(instances)
+
+    if fields is None:
+        fields = {name for instance in instances for name in instance._changed_fields}
+
+    if updated := [model._meta.get_field(name) for name in fields]:
+        updated += [field for field in model._meta.concrete_fields if getattr(field, "auto_now", False)]
+        updated = list(dict.fromkeys(updated))
+
+        # `bulk_update` writes the attributes as they are: files must be committed and timestamps set, as `save` does
+        for instance in instances:
+            for field in updated:
+                setattr(instance, field.attname, field.pre_save(instance, add=False))
+
+        model._base_manager.bulk_update(instances, fields=[field.name for field in updated], batch_size=batch_size)
+
+        if is_tagged_model(model=model):
+            invalidate_object_tags(model=model, pks=[instance.pk for instance in instances])
+        else:
+            bump_model_generation(model=model)
+
+    for instance in instances:
+        if isinstance(instance, ModelDiffMixin):
+            instance._initial = instance._dict
+    return instances
@@ -1,8 +1,6 @@
 import contextlib
 import logging
 
-from django.db.models import GeneratedField
-
 from drf_kit.serializers import as_dict
 
 logger = logging.getLogger(__name__)
@@ -17,7 +15,12 @@ class ModelDiffMixin:
     def _diff(self):
         initial_dict = self._initial
         current_dict = self._dict
-        diffs = [(k, (v, current_dict[k])) for k, v in initial_dict.items() if v != current_dict[k]]
+        if deferred := [name for name in current_dict if name not in initial_dict]:
+            # Fields deferred when the object was loaded: their initial values are only fetched when needed
+            initial_dict = {**initial_dict, **self._get_db_dict(names=deferred)}
+        diffs = [
+            (k, (v, current_dict[k])) for k, v in initial_dict.items() if k in current_dict and v != current_dict[k]
+        ]
         return dict(diffs)
 
     @property
@@ -38,34 +41,36 @@ class ModelDiffMixin:
     @property
     def _dict(self):
         # ref: https://github.com/django/django/blob/4.0.2/django/forms/models.py#L86
-        data = {}
-
-        # If there's any deferred field (i.e. lazy loading),
-        # refresh the whole object at once, instead of letting `value_from_object` refresh one by one
-        # TODO: Lazily compute the diff only for the deferred fields, otherwise .only() will be useless
-        lazy_fields = []
+        # Deferred fields (i.e. lazy loading) are left out, so that .only() and .defer() actually save the queries,
+        # and their initial values are fetched once they are assigned, see `_diff`
         deferred_fields = self.get_deferred_fields()
-        for field in self._meta.get_fields():
-            if isinstance(field, GeneratedField):
-                continue
-            if field.name in deferred_fields:
-                lazy_fields.append(field)
-
-        if lazy_fields:
-            # refresh_from_db() will populate the deferred fields, this is causing max-recursing error,
-            # so we refresh all of them at once
-            self.refresh_from_db(fields=[field.attname for field in self._meta.concrete_fields])
-
-        for field in self._meta.fields:
-            if not getattr(field, "editable", False):
-                continue
-            serializable_value = field.value_from_object(self)
-            with contextlib.suppress(Exception):
-                serializable_value = field.get_prep_value(value=serializable_value)
-
-            data[_field_name(field)] = serializable_value
-
-        return as_dict(data)
+        return as_dict(
+            {
+                _field_name(field): _prep_value(field=field, value=field.value_from_object(self))
+                for field in _get_editable_fields(model=self)
+                if field.attname not in deferred_fields
+            }
+        )
+
+    def _get_db_dict(self, names):
+        fields = [field for field in _get_editable_fields(model=self) if _field_name(field) in names]
+        if self.pk is None or not fields:
+            return {}
+
+        values = type(self)._base_manager.filter(pk=self.pk).values(*[field.attname for field in fields]).first()
+        if values is None:
+            return {}
+        return as_dict({_field_name(field): _prep_value(field=field, value=values[field.attname]) for field in fields})
+
+
+def _get_editable_fields(model):
+    return [field for field in model._meta.fields if getattr(field, "editable", False)]
+
+
+def _prep_value(field, value):
+    with contextlib.suppress(Exception):
+        value = field.get_prep_value(value=value)
+    return value
 
 
 def _field_name(field):
@@ -15,27 +15,29 @@ class BoundedFileMixin:
         if not being_created:
             return
 
+        if self._bind_files():
+            kwargs.pop("force_insert", None)
+            super().save(*args, **kwargs)
+
+    def _bind_files(self) -> bool:
+        # Files uploaded before the object existed are moved to their final path, which may depend on the pk
         file_fields = [f for f in self._meta.get_fields() if isinstance(f, models.FileField)]
 
-        if file_fields:
-            changed = False
-            for field in file_fields:
-                file = getattr(self, field.name)
-                if file:
-                    old_file = file.name
-                    new_file = file.field.generate_filename(self, Path(old_file).name)
-
-                    if new_file != old_file:
-                        changed = True
-
-                        if hasattr(file.storage, "move"):
-                            file.storage.move(previous_name=old_file, new_name=new_file)
-                        else:  # still works when using local filesystem
-                            file.storage.save(new_file, file)
-                            file.storage.delete(old_file)
-                        file.name = new_file
-                        file.close()
-
-            if changed:
-                kwargs.pop("force_insert", None)
-                super().save(*args, **kwargs)
+        changed = False
+        for field in file_fields:
+            file = getattr(self, field.name)
+            if file:
+                old_file = file.name
+                new_file = file.field.generate_filename(self, Path(old_file).name)
+
+                if new_file != old_file:
+                    changed = True
+
+                    if hasattr(file.storage, "move"):
+                        file.storage.move(previous_name=old_file, new_name=new_file)
+                    else:  # still works when using local filesystem
+                        file.storage.save(new_file, file)
+                        file.storage.delete(old_file)
+                    file.name = new_file
+                    file.close()
+        return changed
@@ -12,6 +12,11 @@ def assert_inherited_type(sender, instance, **kwargs):
     instance.type = instance.__class__.__name__.lower()
 
 
+def assert_inherited_types(instances):
+    for instance in instances:
+        assert_inherited_type(sender=instance.__class__, instance=instance)
+
+
 class InheritanceModelMixin(models.Model):
     type = models.CharField(
         max_length=100,
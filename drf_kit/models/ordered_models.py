@@ -36,6 +36,46 @@ def assert_order(sender, instance, **kwargs):
             obj.__class__.objects.filter(pk=obj.pk).update(order=index)
 
 
+def assert_orders(instances):
+    # Same as `assert_order` on each new instance, in sequence, but with a single query per grouping
+    groups, deleted = {}, []
+    for instance in instances:
+        wrt = tuple(instance._wrt_map().items())
+        if wrt not in groups:
+            groups[wrt] = list(instance.get_ordering_queryset())
+        group = groups[wrt]
+
+        order = getattr(instance, instance.order_field_name)
+        if getattr(instance, "is_deleted", False):
+            # Deleted objects are left out of the ordering
+            if order is None:
+                deleted.append((wrt, instance))
+        elif order is not None:
+            group.insert(max(0, order), instance)
+        else:
+            group.append(instance)
+
+    created = {id(instance) for instance in instances}
+    shifted = []
+    for group in groups.values():
+        for index, obj in enumerate(group):
+            if id(obj) in created:
+                setattr(obj, obj.order_field_name, index)
+            elif obj.order != index:
+                obj.order = index
+                shifted.append(obj)
+
+    # Once the grouping is settled, each deleted object takes the next free position
+    free = {wrt: len(group) for wrt, group in groups.items()}
+    for wrt, instance in deleted:
+        setattr(instance, instance.order_field_name, free[wrt])
+        free[wrt] += 1
+
+    if shifted:
+        # update order without triggering signals
+        shifted[0].__class__.objects.bulk_update(shifted, fields=["order"])
+
+
 class OrderedModelMixin(OrderedModelBase):
     order = models.PositiveIntegerField(
         db_index=True,
@@ -1,16 +1,21 @@
+import functools
 import inspect
 import json
 import zoneinfo
+from collections.abc import Iterable, Mapping
 from datetime import datetime
 from decimal import Decimal
 from zoneinfo import ZoneInfo
 
 from dateutil import parser
 from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
 from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.db.backends.postgresql.psycopg_any import Range
+from django.db.models.constants import LOOKUP_SEP
 from django.db.models.fields.files import FieldFile
+from ordered_model.models import OrderedModelBase
 from rest_framework import serializers
 from rest_framework.relations import PrimaryKeyRelatedField
 
@@ -51,6 +56,167 @@ class ForeignKeyField(PrimaryKeyRelatedField):
         return super().to_representation(value)
 
 
+def _get_fields_loading(
+    serializer_fields: Mapping[str, serializers.Field], model: type[models.Model]
+) -> dict[str, tuple[frozenset[str], frozenset[str], tuple[str, ...] | None]]:
+    # For each readable field: the related lookups it needs, and the model's columns it reads (None if unknown)
+    loading = {}
+    for name, field in serializer_fields.items():
+        if field.write_only:
+            continue
+        select, prefetch = set(), set()
+        _collect_related_lookups(field=field, model=model, prefix="", many=False, select=select, prefetch=prefetch)
+        loading[name] = frozenset(select), frozenset(prefetch), _get_field_columns(field=field, model=model)
+    return loading
+
+
+class FieldsLoading:
+    """How a serializer's readable fields are loaded from a model, inspected once and reusable for any fieldset"""
+
+    def __init__(self, serializer_fields: Mapping[str, serializers.Field], model: type[models.Model]):
+        self.model = model
+        self._loading = _get_fields_loading(serializer_fields, model)
+
+    def get_related_lookups(self, fields: Iterable[str] | None = None) -> tuple[tuple[str, ...], tuple[str, ...]]:
+        select, prefetch = set(), set()
+        for name, (field_select, field_prefetch, _) in self._loading.items():
+            if fields is None or name in fields:
+                select.update(field_select)
+                prefetch.update(field_prefetch)
+        return tuple(sorted(select)), tuple(sorted(prefetch))
+
+    def get_loaded_columns(self, fields: Iterable[str]) -> tuple[str, ...] | None:
+        columns = {self.model._meta.pk.name, *_get_model_columns(model=self.model)}
+        for name, (_, _, field_columns) in self._loading.items():
+            if name not in fields:
+                continue
+            if field_columns is None:
+                return None
+            columns.update(field_columns)
+        return tuple(sorted(columns))
+
+
+@functools.cache
+def has_request_dependent_fields(serializer_class: type[serializers.BaseSerializer]) -> bool:
+    """Whether the serializer (or a nested one) may build its fields differently on each request"""
+    for klass in serializer_class.__mro__:
+        if klass is object or klass.__module__.startswith("rest_framework."):
+            continue
+        if any(name in vars(klass) for name in ("__init__", "get_fields", "fields")):
+            return True
+
+    for field in getattr(serializer_class, "_declared_fields", {}).values():
+        nested = getattr(field, "child", field)
+        if isinstance(nested, serializers.BaseSerializer) and has_request_dependent_fields(type(nested)):
+            return True
+    return False
+
+
+def get_readable_fields(serializer_fields: Mapping[str, serializers.Field]) -> tuple[str, ...]:
+    return tuple(name for name, field in serializer_fields.items() if not field.write_only)
+
+
+def get_related_lookups(
+    serializer_fields: Mapping[str, serializers.Field],
+    model: type[models.Model],
+    fields: Iterable[str] | None = None,
+) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    """Relations read by the serializer's fields, as the `select_related` and `prefetch_related` lookups loading them"""
+    return FieldsLoading(serializer_fields=serializer_fields, model=model).get_related_lookups(fields=fields)
+
+
+def get_loaded_columns(
+    serializer_fields: Mapping[str, serializers.Field], model: type[models.Model], fields: Iterable[str]
+) -> tuple[str, ...] | None:
+    """Model fields read by the given serializer fields, to be loaded with `only()`, or None if they can't be told"""
+    return FieldsLoading(serializer_fields=serializer_fields, model=model).get_loaded_columns(fields=fields)
+
+
+def _get_model_columns(model) -> tuple[str, ...]:
+    # Columns read by the model itself when instantiated, which would otherwise be loaded one instance at a time
+    if not issubclass(model, OrderedModelBase):
+        return ()
+    wrt = [lookup.split(LOOKUP_SEP)[0] for lookup in model.get_order_with_respect_to()]
+    return (model.order_field_name, *wrt)
+
+
+def _get_field_columns(field, model) -> tuple[str, ...] | None:
+    if field.source == "*":
+        if not isinstance(field, serializers.Serializer):
+            return None
+        columns = [_get_field_columns(field=nested, model=model) for nested in field.fields.values()]
+        if None in columns:
+            return None
+        return tuple(column for nested_columns in columns for column in nested_columns)
+
+    try:
+        model_field = model._meta.get_field(field.source_attrs[0])
+    except FieldDoesNotExist:
+        # Properties and methods might read any field
+        return None
+    if model_field.concrete:
+        return (model_field.name,)
+    if model_field.is_relation and model_field.related_model is not None:
+        # Many-valued and reverse relations are loaded by their own queries
+        return ()
+    return None
+
+
+def _collect_related_lookups(field, model, prefix, many, select, prefetch):
+    if field.write_only:
+        return
+
+    if field.source == "*":
+        if isinstance(field, serializers.Serializer):
+            for nested in field.fields.values():
+                _collect_related_lookups(
+                    field=nested, model=model, prefix=prefix, many=many, select=select, prefetch=prefetch
+                )
+        return
+
+    attrs = field.source_attrs
+    if isinstance(field, PrimaryKeyRelatedField) and not getattr(field, "m2m", False):
+        # Only the primary key is read, which is already in the row
+        attrs = attrs[:-1]
+
+    lookup, related_model, many_valued = _follow_relations(model=model, attrs=attrs)
+    if not lookup:
+        return
+
+    path = f"{prefix}{lookup}"
+    many_valued = many or many_valued
+    (prefetch if many_valued else select).add(path)
+
+    nested = field.child if isinstance(field, serializers.ListSerializer) else field
+    # Nested serializers of related objects read relations of their own
+    if isinstance(nested, serializers.Serializer) and lookup == "__".join(field.source_attrs):
+        for nested_field in nested.fields.values():
+            _collect_related_lookups(
+                field=nested_field,
+                model=related_model,
+                prefix=f"{path}__",
+                many=many_valued,
+                select=select,
+                prefetch=prefetch,
+            )
+
+
+def _follow_relations(model, attrs) -> tuple[str, type[models.Model] | None, bool]:
+    lookup, many = [], False
+    for attr in attrs:
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            break
+        # Foreign keys' `_id` attributes are not traversals, and generic relations can't be joined
+        if not field.is_relation or field.related_model is None or field.name != attr:
+            break
+        lookup.append(attr)
+        many = many or field.many_to_many or field.one_to_many
+        model = field.related_model
+    return "__".join(lookup), model, many
+
+
 DATETIME_FORMAT = settings.REST_FRAMEWORK.get("DATETIME_FORMAT", "%Y-%m-%dT%H:%M:%SZ")
 DEFAULT_TIMEZONE = zoneinfo.ZoneInfo(settings.TIME_ZONE)
 
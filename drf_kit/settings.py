@@ -4,11 +4,32 @@ from rest_framework.settings import APISettings
 USER_SETTINGS = getattr(settings, "REST_FRAMEWORK_TOOLKIT", None)
 
 DEFAULTS = {
-    "DEFAULT_BODY_CACHE_KEY_FUNC": "drf_kit.cache.body_cache_key_constructor",
+    "DEFAULT_BODY_CACHE_KEY_FUNC": "drf_kit.cache.canonical_body_cache_key_constructor",
+    "DEFAULT_CACHE_STALE_TIMEOUT": 0,
+    "CACHE_REFRESH_WORKERS": 4,
+    "DEFAULT_CACHE_LOCK_TIMEOUT": 0,
+    "CACHE_LOCK_POLL_INTERVAL": 0.05,
+    "DEFAULT_CACHE_COMPRESSION": None,
+    "CACHE_COMPRESSION_MIN_SIZE": 200,
+    "DEFAULT_CACHE_LOCAL_TIMEOUT": 0,
+    "CACHE_LOCAL_MAX_SIZE": 64 * 1024 * 1024,
+    "DEFAULT_CACHE_NEGATIVE_TIMEOUT": 0,
+    "DEFAULT_CACHE_EMPTY_TIMEOUT": 0,
+    "CACHE_CHUNK_SIZE": 0,
+    "CACHE_MAX_ENTRY_SIZE": 0,
+    "DEFAULT_CACHE_TTL_JITTER": 0,
+    "DEFAULT_CACHE_EARLY_REFRESH": 0,
+    "DEFAULT_CACHE_AVAILABILITY_EXPIRY": "model",
+    "CACHE_METRICS_ENABLED": True,
+    "CACHE_METRICS_EXPORTER": None,
+    "CACHE_WARMUP": {},
+    "DEFAULT_BULK_CREATE_BATCH_SIZE": 0,
+    "DEFAULT_BULK_UPDATE_BATCH_SIZE": None,
 }
 
 IMPORT_STRINGS = [
     "DEFAULT_BODY_CACHE_KEY_FUNC",
+    "CACHE_METRICS_EXPORTER",
 ]
 
 toolkit_api_settings = APISettings(USER_SETTINGS, DEFAULTS, IMPORT_STRINGS)
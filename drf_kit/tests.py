@@ -19,6 +19,8 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.test import APITransactionTestCase
 
+from drf_kit.cache import get_cache_metrics, get_local_cache
+
 logger = logging.getLogger("drf-kit")
 
 
@@ -28,6 +30,8 @@ class BaseApiTest(APITransactionTestCase):
     def setUp(self):
         super().setUp()
         cache.clear()
+        get_local_cache().clear()
+        get_cache_metrics().clear()
 
     def real_cache(self, caches: dict | None = None):
         if not caches:
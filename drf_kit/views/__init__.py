@@ -1,3 +1,4 @@
+from drf_kit.views.metrics_views import CacheMetricsView
 from drf_kit.views.nested_viewsets import (
     CachedNestedModelViewSet,
     CachedReadOnlyNestedModelViewSet,
@@ -31,6 +32,7 @@ from drf_kit.views.viewsets import (
 )
 
 __all__ = (
+    "CacheMetricsView",
     "CachedModelViewSet",
     "CachedNestedModelViewSet",
     "CachedNonDestructiveModelViewSet",
@@ -0,0 +1,56 @@
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import mixins
+from rest_framework.response import Response
+
+try:
+    from adrf import viewsets as async_viewsets
+    from adrf.mixins import get_data
+except ImportError as exc:
+    raise ImproperlyConfigured("Async viewsets require the `adrf` package") from exc
+
+from drf_kit.cache import cache_response
+from drf_kit.views.viewsets import (
+    CacheResponseMixin,
+    ModelViewSet,
+    MultiSerializerMixin,
+    ReadOnlyModelViewSet,
+    get_cache_response_kwargs,
+)
+
+
+class AsyncCacheResponseMixin(CacheResponseMixin):
+    # Only the cached actions are async: writes keep running the regular actions, in a thread
+
+    @cache_response(**get_cache_response_kwargs())
+    async def list(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_response_serializer(page, many=True)
+            return await self.get_apaginated_response(await get_data(serializer))
+
+        instances = [instance async for instance in queryset]
+        serializer = self.get_response_serializer(instances, many=True)
+        return Response(await get_data(serializer))
+
+    @cache_response(**get_cache_response_kwargs())
+    async def retrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_response_serializer(instance)
+        return Response(await get_data(serializer))
+
+
+class AsyncCachedModelViewSet(
+    AsyncCacheResponseMixin,
+    MultiSerializerMixin,
+    mixins.CreateModelMixin,
+    mixins.UpdateModelMixin,
+    mixins.DestroyModelMixin,
+    async_viewsets.GenericViewSet,
+):
+    http_method_names = ModelViewSet.http_method_names
+
+
+class AsyncCachedReadOnlyModelViewSet(AsyncCacheResponseMixin, MultiSerializerMixin, async_viewsets.GenericViewSet):
+    http_method_names = ReadOnlyModelViewSet.http_method_names
@@ -0,0 +1,17 @@
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from drf_kit.cache import get_cache_metrics
+
+
+class CacheMetricsView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, *args, **kwargs):
+        return Response(get_cache_metrics().snapshot())
+
+    def delete(self, request, *args, **kwargs):
+        get_cache_metrics().clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
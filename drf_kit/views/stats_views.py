@@ -5,9 +5,21 @@ from drf_kit.filters import IntBooleanFilter
 
 class StatsViewMixin:
     serializer_stats_class = None
+    cache_query_params = ("stats",)
 
     @property
     def with_stats(self):
+        # Parsed once per request, since the queryset, the serializer and the cache key all check it
+        request = self.request
+        memo = self.__dict__.get("_with_stats_memo")
+        if memo is not None and memo[0] is request:
+            return memo[1]
+
+        with_stats = self._parse_stats()
+        self._with_stats_memo = (request, with_stats)
+        return with_stats
+
+    def _parse_stats(self):
         stats_param = self.request.query_params.get("stats", "0")
         try:
             stats_value = int(stats_param)
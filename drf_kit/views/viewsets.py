@@ -1,21 +1,38 @@
+import inspect
 import logging
 
-from django.db import IntegrityError
-from django.db.models import Model
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Model, QuerySet
+from django.db.models.constants import LOOKUP_SEP
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import MethodNotAllowed
+from rest_framework.exceptions import MethodNotAllowed, NotFound, ValidationError
 from rest_framework.response import Response
+from rest_framework.serializers import (
+    Field,
+    ListSerializer,
+    ModelSerializer,
+    Serializer,
+    raise_errors_on_nested_writes,
+)
 from rest_framework.settings import api_settings
+from rest_framework.utils import model_meta
 from rest_framework_extensions.cache.mixins import BaseCacheResponseMixin
+from rest_framework_extensions.settings import extensions_api_settings
 
 from drf_kit import exceptions, filters
-from drf_kit.cache import cache_response
+from drf_kit.cache import CACHE_RESPONSE_OPTIONS, batch_cache_invalidation, cache_response
 from drf_kit.exceptions import ConflictException, DuplicatedRecord, ExclusionDuplicatedRecord
+from drf_kit.models import ModelDiffMixin, bulk_create, bulk_update, can_bulk_create, can_bulk_update
+from drf_kit.serializers import FieldsLoading, get_readable_fields, has_request_dependent_fields
 from drf_kit.settings import toolkit_api_settings
 
 logger = logging.getLogger(__name__)
 
+# Inspections of the response serializers, by viewset, action and serializer class
+_response_inspections = {}
+
 
 class MultiSerializerMixin:
     serializer_detail_class = None
@@ -29,18 +46,82 @@ class MultiSerializerMixin:
 
     serializer_list_class = None
 
+    # Load the relations read by the response serializer upfront, see `prefetch_queryset`
+    auto_prefetch = True
+
+    # Sparse fieldsets: only the response fields listed (or not omitted) are serialized and loaded
+    fields_query_param = "fields"
+    omit_query_param = "omit"
+
+    # Attributes the routing tables are built from, see `_routes`
+    routed_attributes = (
+        "serializer_detail_class",
+        "serializer_create_class",
+        "serializer_update_class",
+        "serializer_list_class",
+        "queryset_detail",
+        "queryset_create",
+        "queryset_update",
+    )
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if any(name.startswith(("serializer_", "queryset_")) for name in kwargs):
+            # `as_view` arguments replaced the class' serializers or querysets
+            self._view_routes = self._build_routes(view=self)
+
+    @property
+    def _routes(self):
+        routes = self.__dict__.get("_view_routes")
+        if routes is None:
+            routes = self._get_routes(view=self)
+        return routes
+
+    @classmethod
+    def _get_routes(cls, view=None):
+        # Action-based routing tables, built on first use instead of on every lookup,
+        # and rebuilt if the routed attributes were replaced since
+        attributes = tuple(inspect.getattr_static(cls, name, None) for name in cls.routed_attributes)
+        if view is not None and any(hasattr(type(attribute), "__get__") for attribute in attributes):
+            # Properties and other descriptors are read from the view itself, once per request
+            view._view_routes = cls._build_routes(view=view)
+            return view._view_routes
+
+        memo = cls.__dict__.get("_routes_memo")
+        if memo is not None and all(old is new for old, new in zip(memo[0], attributes, strict=True)):
+            return memo[1]
+
+        routes = cls._build_routes()
+        cls._routes_memo = (attributes, routes)
+        return routes
+
+    @classmethod
+    def _build_routes(cls, view=None):
+        view = view or cls
+        return {
+            "serializer": {
+                "retrieve": view.serializer_detail_class,
+                "create": view.serializer_create_class,
+                "update": view.serializer_update_class or view.serializer_create_class,
+            },
+            "response_serializer": {
+                "retrieve": view.serializer_detail_class,
+                "create": view.serializer_detail_class,
+                "update": view.serializer_detail_class,
+            },
+            "queryset": {
+                "retrieve": view.queryset_detail,
+                "create": view.queryset_create,
+                # Querysets can't be tested for truth without hitting the database
+                "update": view.queryset_create if view.queryset_update is None else view.queryset_update,
+            },
+        }
+
     def _get_serializer_extra_kwargs(self):
         return {}
 
     def get_serializer_class(self):
-        serializers = {
-            "retrieve": self.serializer_detail_class,
-            "create": self.serializer_create_class,
-            "update": self.serializer_update_class or self.serializer_create_class,
-        }
-        action = self._get_action()
-
-        klass = serializers.get(action)
+        klass = self._routes["serializer"].get(self._get_action())
 
         if not klass:
             klass = super().get_serializer_class()
@@ -52,14 +133,7 @@ class MultiSerializerMixin:
         return super().get_serializer(*args, **kwargs)
 
     def get_response_serializer_class(self):
-        serializers = {
-            "retrieve": self.serializer_detail_class,
-            "create": self.serializer_detail_class,
-            "update": self.serializer_detail_class,
-        }
-        action = self._get_action()
-
-        klass = serializers.get(action)
+        klass = self._routes["response_serializer"].get(self._get_action())
 
         if not klass:
             klass = super().get_serializer_class()
@@ -68,21 +142,140 @@ class MultiSerializerMixin:
     def get_response_serializer(self, obj, **kwargs):
         kwargs.update(self._get_serializer_extra_kwargs())
         kwargs.setdefault("context", self.get_serializer_context())
-        return self.get_response_serializer_class()(obj, **kwargs)
+        serializer = self.get_response_serializer_class()(obj, **kwargs)
+
+        if (sparse_fields := self.get_sparse_fields()) is not None:
+            fields = serializer.child.fields if isinstance(serializer, ListSerializer) else serializer.fields
+            for name in [name for name, field in fields.items() if not field.write_only and name not in sparse_fields]:
+                del fields[name]
+        return serializer
+
+    def get_sparse_fields(self) -> set[str] | None:
+        if self._get_action() not in ("list", "retrieve"):
+            return None
+
+        params = self.request.query_params
+        requested, omitted = (
+            {name.strip() for value in params.getlist(param) for name in value.split(",")} - {""}
+            for param in (self.fields_query_param, self.omit_query_param)
+        )
+        if not requested and not omitted:
+            return None
+
+        if (readable := self._inspect_response_serializer(key=("readable",), inspect=get_readable_fields)) is None:
+            return None
+        readable = set(readable)
+        return (readable & requested if requested else readable) - omitted
+
+    def get_response_fields(self):
+        # Fields of the response serializer, which may depend on the request (e.g. on the user), built once per request
+        request = self.request
+        memo = self.__dict__.get("_response_fields_memo")
+        if memo is not None and memo[0] is request:
+            return memo[1]
+
+        try:
+            fields = self.get_response_serializer_class()(context=self.get_serializer_context()).fields
+        except Exception:
+            # Related loading and sparse fieldsets are skipped, the response serializer fails on its own
+            logger.warning(f"Unable to inspect the response serializer of {self.__class__.__name__}", exc_info=True)
+            fields = None
+
+        self._response_fields_memo = (request, fields)
+        return fields
+
+    def get_response_loading(self, model) -> FieldsLoading | None:
+        return self._inspect_response_serializer(
+            key=("loading", model),
+            inspect=lambda serializer_fields: FieldsLoading(serializer_fields=serializer_fields, model=model),
+        )
+
+    def _inspect_response_serializer(self, key, inspect):
+        # The response serializer's fields only depend on the viewset and the action, so they're inspected once,
+        # unless the serializer builds them on each request
+        serializer_class = self.get_response_serializer_class()
+        if has_request_dependent_fields(serializer_class):
+            serializer_fields = self.get_response_fields()
+            return None if serializer_fields is None else inspect(serializer_fields)
+
+        key = (type(self), self._get_action(), serializer_class, *key)
+        try:
+            return _response_inspections[key]
+        except KeyError:
+            pass
+
+        serializer_fields = self.get_response_fields()
+        inspection = None if serializer_fields is None else inspect(serializer_fields)
+        _response_inspections[key] = inspection
+        return inspection
 
     def get_queryset(self, *args, **kwargs):
-        querysets = {
-            "retrieve": self.queryset_detail,
-            "create": self.queryset_create,
-            "update": self.queryset_update or self.queryset_create,
-        }
         action = self._get_action()
 
-        queryset = querysets.get(action)
+        queryset = self._routes["queryset"].get(action)
         queryset = super().get_queryset(*args, **kwargs) if not queryset else queryset.all()
+        # Deletions are routed as "list" too, but serialize nothing
+        if action in ("list", "retrieve") and self.request.method in ("GET", "HEAD"):
+            if self.auto_prefetch:
+                queryset = self.prefetch_queryset(queryset=queryset)
+            queryset = self.project_queryset(queryset=queryset)
         return queryset
 
+    def prefetch_queryset(self, queryset):
+        if not isinstance(queryset, QuerySet) or queryset._fields is not None or queryset.query.combinator:
+            return queryset
+
+        if (loading := self.get_response_loading(model=queryset.model)) is None:
+            return queryset
+
+        select, prefetch = loading.get_related_lookups(fields=self.get_sparse_fields())
+
+        deferred, defer = queryset.query.deferred_loading
+        if deferred:
+            # Relations can't be both deferred and traversed
+            loaded = {name.split(LOOKUP_SEP)[0] for name in deferred}
+            select = [lookup for lookup in select if (lookup.split(LOOKUP_SEP)[0] in loaded) is not defer]
+
+        # Lookups set by the viewset itself take precedence
+        seen = {getattr(lookup, "prefetch_to", lookup) for lookup in queryset._prefetch_related_lookups}
+        prefetch = [lookup for lookup in prefetch if lookup not in seen]
+
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+    def project_queryset(self, queryset):
+        # Sparse fieldsets only load the columns read by the kept fields
+        if not isinstance(queryset, QuerySet) or queryset._fields is not None or queryset.query.combinator:
+            return queryset
+        if queryset.query.deferred_loading[0] or (sparse_fields := self.get_sparse_fields()) is None:
+            return queryset
+
+        if (loading := self.get_response_loading(model=queryset.model)) is None:
+            return queryset
+        if (columns := loading.get_loaded_columns(fields=sparse_fields)) is None:
+            return queryset
+
+        joined = queryset.query.select_related
+        if joined is True:
+            return queryset
+        # Joined relations must be loaded, even if their fields were left out
+        return queryset.only(*columns, *(joined or {}))
+
     def _get_action(self):
+        # Resolved once per request, since every serializer and queryset lookup depends on it
+        request = self.request
+        memo = self.__dict__.get("_action_memo")
+        if memo is not None and memo[0] is request:
+            return memo[1]
+
+        action = self._resolve_action()
+        self._action_memo = (request, action)
+        return action
+
+    def _resolve_action(self):
         def _is_request_to_detail_endpoint():
             if hasattr(self, "lookup_url_kwarg"):
                 lookup = self.lookup_url_kwarg or self.lookup_field
@@ -183,12 +376,39 @@ class NonDestructiveModelViewSet(ModelViewSet):
     http_method_names = ["get", "post", "patch", "head", "options"]
 
 
+def get_cache_response_kwargs(key_func="cache_key_constructor") -> dict[str, str]:
+    """Arguments of `cache_response` reading every option from the view's `cache_*` attributes"""
+    return {"key_func": key_func, **{name: f"cache_{name}" for name in CACHE_RESPONSE_OPTIONS}}
+
+
 class CacheResponseMixin(BaseCacheResponseMixin):
-    @cache_response()
+    cache_key_constructor = extensions_api_settings.DEFAULT_CACHE_KEY_FUNC
+    cache_body_key_constructor = toolkit_api_settings.DEFAULT_BODY_CACHE_KEY_FUNC
+    cache_stale_timeout = toolkit_api_settings.DEFAULT_CACHE_STALE_TIMEOUT
+    cache_lock_timeout = toolkit_api_settings.DEFAULT_CACHE_LOCK_TIMEOUT
+    cache_compression = toolkit_api_settings.DEFAULT_CACHE_COMPRESSION
+    cache_local_timeout = toolkit_api_settings.DEFAULT_CACHE_LOCAL_TIMEOUT
+    cache_negative_timeout = toolkit_api_settings.DEFAULT_CACHE_NEGATIVE_TIMEOUT
+    cache_empty_timeout = toolkit_api_settings.DEFAULT_CACHE_EMPTY_TIMEOUT
+    cache_ttl_jitter = toolkit_api_settings.DEFAULT_CACHE_TTL_JITTER
+    cache_early_refresh = toolkit_api_settings.DEFAULT_CACHE_EARLY_REFRESH
+    cache_availability_expiry = toolkit_api_settings.DEFAULT_CACHE_AVAILABILITY_EXPIRY
+
+    def get_serializer(self, *args, **kwargs):
+        if args:
+            # Served objects tag the cached entries, see `cache_object_tags`
+            self.cached_instances = args[0]
+        return super().get_serializer(*args, **kwargs)
+
+    def get_response_serializer(self, obj, **kwargs):
+        self.cached_instances = obj
+        return super().get_response_serializer(obj, **kwargs)
+
+    @cache_response(**get_cache_response_kwargs())
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
-    @cache_response()
+    @cache_response(**get_cache_response_kwargs())
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
 
@@ -209,7 +429,7 @@ class CachedModelViewSet(CacheResponseMixin, ModelViewSet):
 # and they are good to go.
 class CachedSearchableMixin(SearchMixin, CacheResponseMixin):
     @search_action
-    @cache_response(key_func=toolkit_api_settings.DEFAULT_BODY_CACHE_KEY_FUNC)
+    @cache_response(**get_cache_response_kwargs(key_func="cache_body_key_constructor"))
     def search(self, request, *args, **kwargs):
         return super().search(request, *args, **kwargs)
 
@@ -281,24 +501,156 @@ class UpsertMixin(MultiSerializerMixin):
 
 
 class BulkMixin(MultiSerializerMixin):
+    # Inserts the objects with `bulk_create`, in batches of this size, instead of saving them one by one
+    bulk_create_batch_size = toolkit_api_settings.DEFAULT_BULK_CREATE_BATCH_SIZE
+    bulk_update_batch_size = toolkit_api_settings.DEFAULT_BULK_UPDATE_BATCH_SIZE
+
     def _get_serializer_extra_kwargs(self):
         if self._get_action() != "retrieve":
             return {"many": True}
         return {}
 
-    def get_response_serializer_class(self):
-        serializers = {
-            "retrieve": self.serializer_detail_class,
-            "create": self.serializer_list_class,
-            "update": self.serializer_list_class,
+    @classmethod
+    def _build_routes(cls, view=None):
+        routes = super()._build_routes(view=view)
+        view = view or cls
+        routes["response_serializer"] = {
+            "retrieve": view.serializer_detail_class,
+            "create": view.serializer_list_class,
+            "update": view.serializer_list_class,
         }
-        action = self._get_action()
-
-        klass = serializers.get(action)
+        return routes
 
-        if not klass:
-            klass = super().get_serializer_class()
-        return klass
+    def perform_create(self, serializer):
+        with batch_cache_invalidation():
+            if self.bulk_create_batch_size and self._can_bulk_create(serializer=serializer):
+                return self.perform_bulk_create(serializer)
+            return super().perform_create(serializer)
+
+    def perform_bulk_create(self, serializer):
+        child = serializer.child
+        model = child.Meta.model
+        relations = model_meta.get_field_info(model).relations
+
+        # Same as `ModelSerializer.create`, except the objects are inserted at once
+        instances, many_to_many = [], []
+        for validated_data in serializer.validated_data:
+            raise_errors_on_nested_writes("create", child, validated_data)
+            attrs = dict(validated_data)
+            many_to_many.append(
+                {name: attrs.pop(name) for name in list(attrs) if name in relations and relations[name].to_many}
+            )
+            instances.append(model(**attrs))
+
+        with transaction.atomic():
+            bulk_create(model=model, instances=instances, batch_size=self.bulk_create_batch_size)
+            for instance, related in zip(instances, many_to_many, strict=True):
+                for name, value in related.items():
+                    getattr(instance, name).set(value)
+
+        serializer.instance = instances
+        return instances
+
+    def _can_bulk_create(self, serializer):
+        # Serializers with their own `create` are trusted to know better
+        if not isinstance(serializer, ListSerializer) or type(serializer).create is not ListSerializer.create:
+            return False
+        child = serializer.child
+        if not isinstance(child, ModelSerializer) or type(child).create is not ModelSerializer.create:
+            return False
+        return can_bulk_create(model=child.Meta.model)
 
     def update(self, request, *args, **kwargs):
         raise MethodNotAllowed(method="patch")
+
+    @action(detail=False, methods=["patch"], url_path="bulk")
+    def bulk_update(self, request, *args, **kwargs):
+        serializers = self.get_bulk_update_serializers(data=request.data)
+        with batch_cache_invalidation():
+            objs = self.perform_bulk_update(serializers)
+
+        data = self.get_response_serializer(objs).data
+        return Response(data, status=status.HTTP_200_OK)
+
+    def get_bulk_update_serializers(self, data):
+        # Each item is a partial update of the object identified by its primary key, like `[{"id": 1, "name": "..."}]`
+        if not isinstance(data, list):
+            message = ListSerializer.default_error_messages["not_a_list"].format(input_type=type(data).__name__)
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]})
+
+        queryset = self.filter_queryset(self.get_queryset())
+        pk_field = queryset.model._meta.pk
+
+        pks = []
+        for item in data:
+            try:
+                pk = pk_field.to_python(item[pk_field.name])
+            except (TypeError, KeyError, DjangoValidationError):
+                pk = None
+            pks.append(pk)
+        instances = {obj.pk: obj for obj in queryset.filter(pk__in={pk for pk in pks if pk is not None})}
+
+        serializer_class = self.get_serializer_class()
+        context = self.get_serializer_context()
+        serializers, errors, seen = [], [], set()
+        for item, pk in zip(data, pks, strict=True):
+            if not isinstance(item, dict):
+                message = Serializer.default_error_messages["invalid"].format(datatype=type(item).__name__)
+                errors.append({api_settings.NON_FIELD_ERRORS_KEY: [message]})
+            elif pk_field.name not in item:
+                errors.append({pk_field.name: [Field.default_error_messages["required"]]})
+            elif pk not in instances:
+                errors.append({pk_field.name: [NotFound.default_detail]})
+            elif pk in seen:
+                errors.append({pk_field.name: ["This object is already being updated by another item."]})
+            else:
+                seen.add(pk)
+                self.check_object_permissions(self.request, instances[pk])
+                serializer = serializer_class(instances[pk], data=item, partial=True, context=context)
+                errors.append({} if serializer.is_valid() else serializer.errors)
+                serializers.append(serializer)
+
+        if any(errors):
+            raise ValidationError(errors)
+        return serializers
+
+    def perform_bulk_update(self, serializers):
+        if not serializers or not self._can_bulk_update(serializer=serializers[0]):
+            with transaction.atomic():
+                return [serializer.save() for serializer in serializers]
+
+        model = serializers[0].Meta.model
+        relations = model_meta.get_field_info(model).relations
+
+        # Same as `ModelSerializer.update`, except the objects are written at once
+        instances, many_to_many, fields = [], [], set()
+        for serializer in serializers:
+            raise_errors_on_nested_writes("update", serializer, serializer.validated_data)
+            instance = serializer.instance
+            related = {}
+            for name, value in serializer.validated_data.items():
+                if name in relations and relations[name].to_many:
+                    related[name] = value
+                else:
+                    setattr(instance, name, value)
+                    fields.add(name)
+            instances.append(instance)
+            many_to_many.append(related)
+
+        with transaction.atomic():
+            bulk_update(
+                model=model,
+                instances=instances,
+                fields=None if issubclass(model, ModelDiffMixin) else fields,  # only the fields that actually changed
+                batch_size=self.bulk_update_batch_size,
+            )
+            for instance, related in zip(instances, many_to_many, strict=True):
+                for name, value in related.items():
+                    getattr(instance, name).set(value)
+        return instances
+
+    def _can_bulk_update(self, serializer):
+        # Serializers with their own `update` are trusted to know better
+        if not isinstance(serializer, ModelSerializer) or type(serializer).update is not ModelSerializer.update:
+            return False
+        return can_bulk_update(model=serializer.Meta.model)
@@ -179,3 +179,13 @@ class TrainingPitchSerializer(serializers.BaseModelSerializer):
     class Meta(serializers.BaseModelSerializer.Meta):
         model = models.TrainingPitch
         fields = ("id",)
+
+
+class RoomOfRequirementSerializer(serializers.BaseModelSerializer):
+    class Meta(serializers.BaseModelSerializer.Meta):
+        model = models.RoomOfRequirement
+        fields = (
+            "id",
+            "starts_at",
+            "ends_at",
+        )
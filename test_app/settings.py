@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.1/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -38,6 +39,7 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "rest_framework",
     "django_filters",
+    "drf_kit",
     "test_app.apps.SampleAppConfig",
 ]
 
@@ -126,6 +128,9 @@ USE_TZ = True
 
 STATIC_URL = "/static/"
 
+# Uploaded files (written by the tests) are kept out of the working tree
+MEDIA_ROOT = os.environ.get("MEDIA_ROOT", Path(tempfile.gettempdir()) / "drf-kit-media")
+
 # DRF
 REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "drf_kit.pagination.CustomPagePagination",
@@ -98,6 +98,19 @@ class TestAvailabilityModel(HogwartsTestMixin, BaseApiTest):
             self.assertFalse(obj.is_current)
             self.assertTrue(obj.is_future)
 
+    def test_next_transition(self):
+        self.assertEqual(self.future_date, self.model_class.objects.next_transition(at=self.reference_date))
+        self.assertEqual(self.very_future_date, self.model_class.objects.next_transition(at=self.future_date))
+        self.assertIsNone(self.model_class.objects.next_transition(at=self.very_future_date))
+
+    def test_objects_next_transition(self):
+        for obj in self.past:
+            self.assertIsNone(obj.next_transition)
+        self.assertEqual(self.future_date, self.current[0].next_transition)
+        self.assertIsNone(self.current[-1].next_transition)
+        self.assertEqual(self.future_date, self.future[0].next_transition)
+        self.assertEqual(self.very_future_date, self.future[2].next_transition)
+
     def test_range_inconsistency(self):
         inconsistencies = [
             (self.future_date, self.past_date),
@@ -0,0 +1,185 @@
+from unittest.mock import patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from drf_kit.exceptions import UpdatingSoftDeletedException
+from drf_kit.models import bulk_create, bulk_update, can_bulk_create, can_bulk_update
+from drf_kit.tests import BaseApiTest
+from test_app import models
+from test_app.tests.factories.memory_factories import MemoryFactory
+from test_app.tests.factories.tri_wizard_placement_factories import TriWizardPlacementFactory
+from test_app.tests.tests_base import HogwartsTestMixin
+
+
+class TestBulkCreate(HogwartsTestMixin, BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        self._set_up_wizards()
+
+    def assertOrder(self, placement, expected_order):
+        placement.refresh_from_db()
+        self.assertEqual(expected_order, placement.order)
+
+    def test_single_insert(self):
+        houses = [models.House(name=f"House {i}") for i in range(10)]
+
+        with CaptureQueriesContext(connection) as queries:
+            bulk_create(model=models.House, instances=houses)
+
+        inserts = [query for query in queries if query["sql"].startswith("INSERT")]
+        self.assertEqual(1, len(inserts))
+        self.assertEqual(10, models.House.objects.count())
+        self.assertTrue(all(house.pk for house in houses))
+
+    def test_batch_size(self):
+        houses = [models.House(name=f"House {i}") for i in range(10)]
+
+        with CaptureQueriesContext(connection) as queries:
+            bulk_create(model=models.House, instances=houses, batch_size=4)
+
+        inserts = [query for query in queries if query["sql"].startswith("INSERT")]
+        self.assertEqual(3, len(inserts))
+
+    def test_inherited_type(self):
+        spells = [models.Spell(name="Lumos"), models.Spell(name="Nox")]
+
+        bulk_create(model=models.Spell, instances=spells)
+
+        self.assertEqual(["spell", "spell"], list(models.Spell.objects.values_list("type", flat=True)))
+
+    def test_order(self):
+        year = 1900
+        placement_1 = TriWizardPlacementFactory(year=year, wizard=self.wizards[0], prize="rock")
+        placement_2 = TriWizardPlacementFactory(year=year, wizard=self.wizards[1], prize="stone")
+
+        placement_3 = models.TriWizardPlacement(year=year, wizard=self.wizards[2], prize="wand")
+        placement_4 = models.TriWizardPlacement(year=year, wizard=self.wizards[3], prize="hug", order=1)
+        another_placement = models.TriWizardPlacement(year=2000, wizard=self.wizards[0], prize="cup")
+
+        bulk_create(model=models.TriWizardPlacement, instances=[placement_3, placement_4, another_placement])
+
+        # Same as creating them one by one
+        self.assertOrder(placement_1, 0)
+        self.assertOrder(placement_4, 1)
+        self.assertOrder(placement_2, 2)
+        self.assertOrder(placement_3, 3)
+        self.assertOrder(another_placement, 0)
+
+    def test_order_with_deleted(self):
+        deleted_tale = models.Tale(description="The Tale of the Three Brothers", deleted_at=timezone.now())
+        tale = models.Tale(description="Babbitty Rabbitty and her Cackling Stump")
+        first_tale = models.Tale(description="The Wizard and the Hopping Pot", order=0)
+
+        bulk_create(model=models.Tale, instances=[deleted_tale, tale, first_tale])
+
+        # Deleted objects don't take the positions of the others
+        self.assertOrder(first_tale, 0)
+        self.assertOrder(tale, 1)
+        self.assertOrder(deleted_tale, 2)
+
+    def test_bound_files(self):
+        a_file = SimpleUploadedFile("./pics/harry.jpg", "○⚡︎○".encode())
+        wizard = models.Wizard(name="Harry Potter", picture=a_file)
+
+        bulk_create(model=models.Wizard, instances=[wizard])
+
+        wizard.refresh_from_db()
+        self.assertUUIDFilePath(prefix="wizard", name="thumb", extension="jpg", pk=wizard.pk, file=wizard.picture)
+
+    def test_diff_snapshot(self):
+        wizard = models.Wizard(name="Harry Potter")
+
+        bulk_create(model=models.Wizard, instances=[wizard])
+        self.assertFalse(wizard._has_changed)
+
+        wizard.name = "Harry James Potter"
+        self.assertEqual({"name": ("Harry Potter", "Harry James Potter")}, wizard._diff)
+
+    def test_cache_invalidation(self):
+        with patch("drf_kit.models.bulk_models.bump_model_generation") as bump:
+            bulk_create(model=models.House, instances=[models.House(name="#Always")])
+
+        bump.assert_called_once_with(model=models.House)
+
+    def test_multi_table_inheritance(self):
+        self.assertTrue(can_bulk_create(model=models.Wizard))
+        self.assertTrue(can_bulk_create(model=models.Spell))
+        self.assertFalse(can_bulk_create(model=models.Teacher))
+        self.assertFalse(can_bulk_create(model=models.CombatSpell))
+
+
+class TestBulkUpdate(HogwartsTestMixin, BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        self._set_up_houses()
+        self._set_up_wizards()
+
+    def test_changed_fields(self):
+        house_1, house_2, house_3 = self.houses[:3]
+        house_1.name = "Not Gryffindor"
+        house_2.points_boost = 3
+        updated_at = house_3.updated_at
+
+        with CaptureQueriesContext(connection) as queries:
+            bulk_update(model=models.House, instances=[house_1, house_2, house_3])
+
+        [update] = [query for query in queries if query["sql"].startswith("UPDATE")]
+        self.assertIn('"name"', update["sql"])
+        self.assertIn('"points_boost"', update["sql"])
+        self.assertIn('"updated_at"', update["sql"])
+        self.assertNotIn('"created_at"', update["sql"])
+
+        for house in [house_1, house_2, house_3]:
+            self.assertFalse(house._has_changed)
+            house.refresh_from_db()
+        self.assertEqual("Not Gryffindor", house_1.name)
+        self.assertEqual(3, house_2.points_boost)
+        self.assertGreater(house_3.updated_at, updated_at)
+
+    def test_unchanged(self):
+        with CaptureQueriesContext(connection) as queries:
+            bulk_update(model=models.House, instances=self.houses)
+
+        self.assertEqual([], [query for query in queries if query["sql"].startswith("UPDATE")])
+
+    def test_fields(self):
+        house = self.houses[0]
+        house.name = "Not Gryffindor"
+        house.points_boost = 3
+
+        bulk_update(model=models.House, instances=[house], fields=["points_boost"])
+
+        house.refresh_from_db()
+        self.assertNotEqual("Not Gryffindor", house.name)
+        self.assertEqual(3, house.points_boost)
+
+    def test_soft_deleted(self):
+        memory = MemoryFactory(owner=self.wizards[0])
+        memory.delete()
+        memory.description = "Forgotten"
+
+        with self.assertRaises(UpdatingSoftDeletedException):
+            bulk_update(model=models.Memory, instances=[memory])
+
+    def test_cache_invalidation(self):
+        house = self.houses[0]
+        house.name = "Not Gryffindor"
+
+        with patch("drf_kit.models.bulk_models.bump_model_generation") as bump:
+            bulk_update(model=models.House, instances=[house])
+        bump.assert_called_once_with(model=models.House)
+
+        with (
+            patch.object(models.House, "cache_object_tags", True),
+            patch("drf_kit.models.bulk_models.invalidate_object_tags") as invalidate,
+        ):
+            house.name = "Gryffindor"
+            bulk_update(model=models.House, instances=[house])
+        invalidate.assert_called_once_with(model=models.House, pks=[house.pk])
+
+    def test_ordered_models(self):
+        self.assertTrue(can_bulk_update(model=models.House))
+        self.assertFalse(can_bulk_update(model=models.TriWizardPlacement))
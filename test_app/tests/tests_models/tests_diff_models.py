@@ -96,9 +96,8 @@ class TestModelDiff(BaseApiTest):
         with self.assertNumQueries(2):
             WizardFactory(name="Harry Potter", age=12)
 
-        with self.assertNumQueries(2):
+        with self.assertNumQueries(1):
             # 1 SELECT with only
-            # 1 SELECT with all fields (diff model)
             wizard = Wizard.objects.only("name").first()
 
         with self.assertNumQueries(0):
@@ -107,3 +106,21 @@ class TestModelDiff(BaseApiTest):
         expected_diff = {}
         self.assertEqual(expected_diff, diff)
         self.assertFalse(wizard._has_changed)
+
+    def test_deferred_fields_changed(self):
+        WizardFactory(name="Harry Potter", age=12)
+        wizard = Wizard.objects.only("name").first()
+
+        wizard.name = "Harry James Potter"
+        with self.assertNumQueries(0):
+            self.assertEqual({"name": ("Harry Potter", "Harry James Potter")}, wizard._diff)
+
+        wizard.age = 13
+        with self.assertNumQueries(1):
+            # 1 SELECT with the initial value of the deferred field
+            diff = wizard._diff
+        self.assertEqual({"name": ("Harry Potter", "Harry James Potter"), "age": (12, 13)}, diff)
+
+        wizard.save()
+        self.assertFalse(wizard._has_changed)
+        self.assertEqual(13, Wizard.objects.get(pk=wizard.pk).age)
@@ -3,9 +3,13 @@ from datetime import UTC, datetime, timedelta
 from zoneinfo import ZoneInfo
 
 from django.db.backends.postgresql.psycopg_any import Range
+from rest_framework.fields import BooleanField, CharField
 
-from drf_kit.serializers import as_dict, as_str
+from drf_kit import serializers
+from drf_kit.serializers import as_dict, as_str, get_loaded_columns, get_related_lookups
 from drf_kit.tests import BaseApiTest
+from test_app import models
+from test_app import serializers as app_serializers
 
 
 class TestAsDict(BaseApiTest):
@@ -34,3 +38,67 @@ class TestAsDict(BaseApiTest):
         upper = datetime(2023, 9, 27, 15, 0, 0, tzinfo=UTC)
         range = Range(upper=upper)
         self.assertEqual(as_dict(range), [None, as_str(upper)])
+
+
+class TestRelatedLookups(BaseApiTest):
+    def test_nested_serializers(self):
+        select, prefetch = get_related_lookups(
+            serializer_fields=app_serializers.SpellCastSerializer().fields, model=models.SpellCast
+        )
+        self.assertEqual(("spell", "wizard", "wizard__house"), select)
+        self.assertEqual((), prefetch)
+
+    def test_primary_keys(self):
+        select, prefetch = get_related_lookups(
+            serializer_fields=app_serializers.TriWizardPlacementSerializer().fields, model=models.TriWizardPlacement
+        )
+        self.assertEqual((), select)
+        self.assertEqual((), prefetch)
+
+    def test_many_related(self):
+        class WizardSerializer(serializers.BaseModelSerializer):
+            spell_ids = serializers.ForeignKeyField(
+                queryset=models.Spell.objects.all(), m2m=True, source="spells", write_only=False
+            )
+            house_name = CharField(source="house.name", read_only=True)
+
+            class Meta(serializers.BaseModelSerializer.Meta):
+                model = models.Wizard
+                fields = ("id", "spell_ids", "house_name")
+
+        class HouseSerializer(serializers.BaseModelSerializer):
+            wizards = WizardSerializer(many=True, read_only=True)
+
+            class Meta(serializers.BaseModelSerializer.Meta):
+                model = models.House
+                fields = ("id", "wizards")
+
+        select, prefetch = get_related_lookups(serializer_fields=HouseSerializer().fields, model=models.House)
+        self.assertEqual((), select)
+        self.assertEqual(("wizards", "wizards__house", "wizards__spells"), prefetch)
+
+    def test_loaded_columns(self):
+        columns = get_loaded_columns(
+            serializer_fields=app_serializers.SpellCastSerializer().fields,
+            model=models.SpellCast,
+            fields={"wizard", "id"},
+        )
+        self.assertEqual(("id", "wizard"), columns)
+
+    def test_loaded_columns_unknown(self):
+        class RoomSerializer(serializers.BaseModelSerializer):
+            is_current = BooleanField(read_only=True)
+
+            class Meta(serializers.BaseModelSerializer.Meta):
+                model = models.RoomOfRequirement
+                fields = ("id", "starts_at", "is_current")
+
+        columns = get_loaded_columns(
+            serializer_fields=RoomSerializer().fields, model=models.RoomOfRequirement, fields={"id"}
+        )
+        self.assertEqual(("id",), columns)
+
+        columns = get_loaded_columns(
+            serializer_fields=RoomSerializer().fields, model=models.RoomOfRequirement, fields={"id", "is_current"}
+        )
+        self.assertIsNone(columns)
@@ -0,0 +1,152 @@
+import inspect
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth.models import Group, User
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.routers import DefaultRouter
+
+from drf_kit.cache import CacheResponse, get_local_cache, group_cache_key_constructor
+from drf_kit.tests import BaseApiTest
+from test_app import models, serializers
+from test_app.tests.tests_base import HogwartsTestMixin
+
+pytest.importorskip("adrf")
+
+from drf_kit.views.async_viewsets import AsyncCachedModelViewSet
+
+
+class AsyncTeacherViewSet(AsyncCachedModelViewSet):
+    queryset = models.Teacher.objects.all()
+    serializer_class = serializers.TeacherSerializer
+
+
+router = DefaultRouter(trailing_slash=False)
+router.register(r"async-teachers", AsyncTeacherViewSet, "async-teacher")
+
+urlpatterns = router.urls
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class TestAsyncCachedView(HogwartsTestMixin, BaseApiTest):
+    url = "/async-teachers"
+
+    def setUp(self):
+        super().setUp()
+        self._set_up_teachers()
+
+    def test_cached_actions_are_async(self):
+        self.assertTrue(AsyncTeacherViewSet.view_is_async)
+        self.assertTrue(inspect.iscoroutinefunction(AsyncTeacherViewSet.list))
+        self.assertTrue(inspect.iscoroutinefunction(AsyncTeacherViewSet.retrieve))
+        self.assertFalse(inspect.iscoroutinefunction(AsyncTeacherViewSet.create))
+
+    def test_cache_list(self):
+        response = self.client.get(self.url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual("MISS", response["X-Cache"])
+        self.assertEqual(len(self.teachers), response.json()["count"])
+
+        cached_response = self.client.get(self.url)
+        self.assertEqual(status.HTTP_200_OK, cached_response.status_code)
+        self.assertEqual("HIT", cached_response["X-Cache"])
+        self.assertEqual(response.content, cached_response.content)
+
+    def test_cache_retrieve(self):
+        url = f"{self.url}/{self.teachers[0].pk}"
+
+        response = self.client.get(url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual("MISS", response["X-Cache"])
+        self.assertEqual(self.teachers[0].name, response.json()["name"])
+
+        cached_response = self.client.get(url)
+        self.assertEqual("HIT", cached_response["X-Cache"])
+        self.assertEqual(response.content, cached_response.content)
+
+    def test_cache_hit_stays_in_event_loop(self):
+        self.client.get(self.url)
+
+        with patch("drf_kit.cache.sync_to_async") as to_thread:
+            response = self.client.get(self.url)
+
+        self.assertEqual("HIT", response["X-Cache"])
+        to_thread.assert_not_called()
+
+    def test_cache_miss_not_found(self):
+        response = self.client.get(f"{self.url}/999999")
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_cache_invalidated_by_writes(self):
+        url = f"{self.url}/{self.teachers[0].pk}"
+        self.client.get(url)
+
+        response = self.client.patch(url, data={"name": "Horace Slughorn"})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        response = self.client.get(url)
+        self.assertEqual("MISS", response["X-Cache"])
+        self.assertEqual("Horace Slughorn", response.json()["name"])
+
+    def test_cache_etag_not_modified(self):
+        response = self.client.get(self.url)
+
+        cached_response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, cached_response.status_code)
+        self.assertEqual("HIT", cached_response["X-Cache"])
+
+    def test_local_cache_tier_invalidated_by_object_tags(self):
+        url = f"{self.url}/{self.teachers[1].pk}"
+        snape = self.teachers[1]
+
+        with (
+            patch.object(models.Teacher, "cache_object_tags", True),
+            patch.object(AsyncTeacherViewSet, "cache_local_timeout", 5),
+            patch("drf_kit.cache.LocalCache.set", wraps=get_local_cache().set) as local_set,
+        ):
+            self.client.get(url)
+            key, outdated = local_set.call_args.args
+
+            snape.name = "Severus Snape, the Half-Blood Prince"
+            snape.save()
+
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+
+            get_local_cache().set(key, outdated, timeout=5)
+
+            response = self.client.get(url)
+            self.assertEqual("HIT", response["X-Cache"])
+            self.assertEqual("shared", response["X-Cache-Tier"])
+            self.assertEqual(snape.name, response.json()["name"])
+
+    def test_cache_key_reading_database(self):
+        staff = Group.objects.create(name="staff")
+        albus = User.objects.create_user(username="albus")
+        minerva = User.objects.create_user(username="minerva")
+        albus.groups.add(staff)
+        minerva.groups.add(staff)
+
+        with patch.object(AsyncTeacherViewSet, "cache_key_constructor", group_cache_key_constructor):
+            self.client.force_authenticate(user=albus)
+            response = self.client.get(self.url)
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+            self.assertEqual("MISS", response["X-Cache"])
+
+            self.client.force_authenticate(user=minerva)
+            response = self.client.get(self.url)
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+            self.assertEqual("HIT", response["X-Cache"])
+
+
+class TestAsyncCacheResponse(BaseApiTest):
+    def test_wraps_coroutine_functions(self):
+        async def view_method(view_instance, request):
+            return None
+
+        def sync_view_method(view_instance, request):
+            return None
+
+        self.assertTrue(inspect.iscoroutinefunction(CacheResponse()(view_method)))
+        self.assertFalse(inspect.iscoroutinefunction(CacheResponse()(sync_view_method)))
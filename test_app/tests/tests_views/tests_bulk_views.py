@@ -1,6 +1,10 @@
-from unittest.mock import ANY
+from decimal import Decimal
+from unittest.mock import ANY, patch
 
-from test_app import models
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from test_app import models, views
 from test_app.tests.tests_views.tests_crud_views import TestCRUDView
 
 
@@ -42,6 +46,42 @@ class TestBulkView(TestCRUDView):
         houses = models.House.objects.all()
         self.assertEqual(6, houses.count())
 
+    def test_post_endpoint_bulk_create(self):
+        url = self.url
+        data = [{"name": f"House {i}", "points_boost": i} for i in range(10)]
+
+        with (
+            patch.object(views.HouseBulkViewSet, "bulk_create_batch_size", 4),
+            CaptureQueriesContext(connection) as queries,
+        ):
+            response = self.client.post(url, data=data, format="json")
+        self.assertEqual(201, response.status_code)
+
+        expected = [
+            {
+                "id": ANY,
+                "name": f"House {i}",
+                "points_boost": f"{i}.00",
+                "created_at": ANY,
+            }
+            for i in range(10)
+        ]
+        self.assertEqual(expected, response.json())
+
+        inserts = [query for query in queries if query["sql"].startswith("INSERT")]
+        self.assertEqual(3, len(inserts))
+        self.assertEqual(14, models.House.objects.count())
+
+    def test_post_endpoint_bulk_create_invalid(self):
+        url = self.url
+        data = [{"name": "#Always"}, {"points_boost": 6.66}]
+
+        with patch.object(views.HouseBulkViewSet, "bulk_create_batch_size", 100):
+            response = self.client.post(url, data=data, format="json")
+        self.assertEqual(400, response.status_code)
+
+        self.assertEqual(4, models.House.objects.count())
+
     def test_patch_endpoint(self):
         house = self.houses[0]
         url = f"{self.url}/{house.pk}"
@@ -51,6 +91,95 @@ class TestBulkView(TestCRUDView):
         response = self.client.patch(url, data=data)
         self.assertEqual(405, response.status_code)
 
+    def test_bulk_patch_endpoint(self):
+        url = f"{self.url}/bulk"
+        house_1, house_2 = self.houses[0], self.houses[1]
+        data = [
+            {"id": house_2.pk, "points_boost": 3.14},
+            {"id": house_1.pk, "name": "Not Griffindor"},
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(url, data=data, format="json")
+        self.assertEqual(200, response.status_code)
+
+        expected = [
+            {
+                "id": house_2.pk,
+                "name": house_2.name,
+                "points_boost": "3.14",
+                "created_at": ANY,
+            },
+            {
+                "id": house_1.pk,
+                "name": "Not Griffindor",
+                "points_boost": f"{house_1.points_boost:.2f}",
+                "created_at": ANY,
+            },
+        ]
+        self.assertEqual(expected, response.json())
+
+        selects = [query for query in queries if query["sql"].startswith("SELECT")]
+        updates = [query for query in queries if query["sql"].startswith("UPDATE")]
+        self.assertEqual(1, len(selects))
+        self.assertEqual(1, len(updates))
+        self.assertIn('"name"', updates[0]["sql"])
+        self.assertIn('"points_boost"', updates[0]["sql"])
+        self.assertIn('"updated_at"', updates[0]["sql"])
+
+        house_1.refresh_from_db()
+        house_2.refresh_from_db()
+        self.assertEqual("Not Griffindor", house_1.name)
+        self.assertEqual(Decimal("3.14"), house_2.points_boost)
+
+    def test_bulk_patch_endpoint_unchanged(self):
+        url = f"{self.url}/bulk"
+        house = self.houses[0]
+        data = [{"id": house.pk, "name": house.name}]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(url, data=data, format="json")
+        self.assertEqual(200, response.status_code)
+
+        updates = [query for query in queries if query["sql"].startswith("UPDATE")]
+        self.assertEqual([], updates)
+
+    def test_bulk_patch_endpoint_errors(self):
+        url = f"{self.url}/bulk"
+        house_1, house_2 = self.houses[0], self.houses[1]
+        data = [
+            {"id": house_1.pk, "name": "Not Griffindor"},
+            {"id": house_2.pk, "points_boost": "potato"},
+            {"id": 999999, "name": "Durmstrang"},
+            {"name": "Beauxbatons"},
+            {"id": house_1.pk, "name": "Griffindor again"},
+            "potato",
+        ]
+
+        response = self.client.patch(url, data=data, format="json")
+        self.assertEqual(400, response.status_code)
+
+        expected = [
+            {},
+            {"points_boost": ["A valid number is required."]},
+            {"id": ["Not found."]},
+            {"id": ["This field is required."]},
+            {"id": ["This object is already being updated by another item."]},
+            {"non_field_errors": ["Invalid data. Expected a dictionary, but got str."]},
+        ]
+        self.assertEqual(expected, response.json())
+
+        house_1.refresh_from_db()
+        self.assertNotEqual("Not Griffindor", house_1.name)
+
+    def test_bulk_patch_endpoint_not_a_list(self):
+        url = f"{self.url}/bulk"
+        data = {"id": self.houses[0].pk, "name": "Not Griffindor"}
+
+        response = self.client.patch(url, data=data, format="json")
+        self.assertEqual(400, response.status_code)
+        self.assertEqual({"non_field_errors": ['Expected a list of items but got type "dict".']}, response.json())
+
     def test_put_endpoint(self):
         house = self.houses[0]
         url = f"{self.url}/{house.pk}"
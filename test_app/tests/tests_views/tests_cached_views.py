@@ -1,10 +1,54 @@
-from unittest.mock import patch
+import gzip
+import json
+import math
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import ANY, Mock, patch
+from wsgiref import handlers
 
+from django.contrib.auth.models import Group, User
 from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.http import QueryDict
+from django.utils import timezone
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
 
-from drf_kit.cache import CacheResponse
+from drf_kit.cache import (
+    CacheKeyConstructor,
+    CacheResponse,
+    CanonicalBodyKeyBit,
+    CanonicalCacheKeyConstructor,
+    CanonicalQueryParamsKeyBit,
+    LocalCache,
+    PartitionKeyBit,
+    SchemaKeyBit,
+    _bump_generation,
+    _decode_entry,
+    _get_chunk_keys,
+    batch_cache_invalidation,
+    bump_partition_generation,
+    cache_response,
+    canonical_cache_key_constructor,
+    get_local_cache,
+    get_model_generation,
+    group_cache_key_constructor,
+    user_cache_key_constructor,
+)
+from drf_kit.settings import toolkit_api_settings
 from drf_kit.tests import BaseApiTest
+from test_app import models, serializers, views
+from test_app.tests.factories.memory_factories import MemoryFactory
+from test_app.tests.factories.room_of_requirement_factories import RoomOfRequirementFactory
 from test_app.tests.tests_base import HogwartsTestMixin
 
 
@@ -105,3 +149,1357 @@ class TestCachedView(HogwartsTestMixin, BaseApiTest):
         self.assertEqual(status.HTTP_200_OK, response_json_miss.status_code)
         self.assertEqual("HIT", response_json_miss["X-Cache"])
         self.assertEqual(None, response_json_miss.get("Cache-Control"))
+
+    def test_cache_control_no_store(self):
+        url = self.url
+
+        response = self.client.get(url, HTTP_CACHE_CONTROL="no-store")
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual("MISS", response["X-Cache"])
+
+        response = self.client.get(url)
+        self.assertEqual("MISS", response["X-Cache"])
+
+        response = self.client.get(url, HTTP_CACHE_CONTROL="no-store")
+        self.assertEqual("MISS", response["X-Cache"])
+
+    def test_cache_control_max_age(self):
+        url = self.url
+        now = timezone.now()
+
+        with self.patch_time(some_date=now):
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+            self.assertNotIn("Age", response)
+
+        with self.patch_time(some_date=now + timedelta(seconds=30)):
+            response = self.client.get(url)
+            self.assertEqual("HIT", response["X-Cache"])
+            self.assertEqual("30", response["Age"])
+
+            response = self.client.get(url, HTTP_CACHE_CONTROL="max-age=60")
+            self.assertEqual("HIT", response["X-Cache"])
+
+            response = self.client.get(url, HTTP_CACHE_CONTROL="max-age=10")
+            self.assertEqual("MISS", response["X-Cache"])
+            self.assertEqual("max-age=300", response["Cache-Control"])
+
+            response = self.client.get(url, HTTP_CACHE_CONTROL="max-age=10")
+            self.assertEqual("HIT", response["X-Cache"])
+            self.assertEqual("0", response["Age"])
+
+    def test_cache_control_only_if_cached(self):
+        url = self.url
+
+        response = self.client.get(url, HTTP_CACHE_CONTROL="only-if-cached")
+        self.assertEqual(status.HTTP_504_GATEWAY_TIMEOUT, response.status_code)
+        self.assertEqual("MISS", response["X-Cache"])
+
+        response = self.client.get(url)
+        self.assertEqual("MISS", response["X-Cache"])
+
+        response = self.client.get(url, HTTP_CACHE_CONTROL="only-if-cached")
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual("HIT", response["X-Cache"])
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_CACHE_CONTROL="only-if-cached, max-age=0")
+        self.assertEqual(status.HTTP_504_GATEWAY_TIMEOUT, response.status_code)
+
+    def test_cache_invalidated_by_write(self):
+        url = self.url
+
+        response = self.client.get(url)
+        self.assertEqual("MISS", response["X-Cache"])
+
+        detail_url = f"{url}/{self.teachers[0].pk}"
+        response = self.client.get(detail_url)
+        self.assertEqual("MISS", response["X-Cache"])
+
+        teacher = self.teachers[0]
+        teacher.name = "Albus Percival Wulfric Brian Dumbledore"
+        teacher.save()
+
+        response = self.client.get(url)
+        self.assertEqual("MISS", response["X-Cache"])
+        self.assertIn(teacher.name, [item["name"] for item in response.json()["results"]])
+
+        response = self.client.get(detail_url)
+        self.assertEqual("MISS", response["X-Cache"])
+        self.assertEqual(teacher.name, response.json()["name"])
+
+        response = self.client.get(url)
+        self.assertEqual("HIT", response["X-Cache"])
+
+    def test_cache_invalidated_by_delete(self):
+        url = self.url
+
+        response = self.client.get(url)
+        self.assertEqual("MISS", response["X-Cache"])
+
+        self.teachers[0].delete()
+
+        response = self.client.get(url)
+        self.assertEqual("MISS", response["X-Cache"])
+        self.assertNotIn(self.teachers[0].pk, [item["id"] for item in response.json()["results"]])
+
+    def test_cache_invalidated_on_commit(self):
+        url = self.url
+
+        response = self.client.get(url)
+        self.assertEqual("MISS", response["X-Cache"])
+
+        with transaction.atomic():
+            self.teachers[0].delete()
+
+            # A read before the commit must not cache its rows under the next generation
+            response = self.client.get(url)
+            self.assertEqual("HIT", response["X-Cache"])
+
+        response = self.client.get(url)
+        self.assertEqual("MISS", response["X-Cache"])
+        self.assertNotIn(self.teachers[0].pk, [item["id"] for item in response.json()["results"]])
+
+        response = self.client.get(url)
+        self.assertEqual("HIT", response["X-Cache"])
+
+    def test_object_tags_written_on_commit(self):
+        url = self.url
+        snape = self.teachers[1]
+
+        with patch.object(models.Teacher, "cache_object_tags", True):
+            response = self.client.get(f"{url}/{snape.pk}")
+            self.assertEqual("MISS", response["X-Cache"])
+
+            with transaction.atomic():
+                snape.name = "Severus Snape, the Half-Blood Prince"
+                snape.save()
+
+                response = self.client.get(f"{url}/{snape.pk}")
+                self.assertEqual("HIT", response["X-Cache"])
+
+            response = self.client.get(f"{url}/{snape.pk}")
+            self.assertEqual("MISS", response["X-Cache"])
+            self.assertEqual(snape.name, response.json()["name"])
+
+    def test_object_tags_written_on_commit_of_model_database(self):
+        snape = self.teachers[1]
+
+        with (
+            patch.object(models.Teacher, "cache_object_tags", True),
+            patch("drf_kit.cache.router.db_for_write", return_value=DEFAULT_DB_ALIAS) as db_for_write,
+            patch("drf_kit.cache.transaction.on_commit", wraps=transaction.on_commit) as on_commit,
+        ):
+            snape.name = "Severus Snape, the Half-Blood Prince"
+            snape.save()
+
+        db_for_write.assert_any_call(models.Teacher)
+        on_commit.assert_called_once_with(ANY, using=DEFAULT_DB_ALIAS, robust=True)
+
+    def test_cache_invalidated_by_object_tags(self):
+        url = self.url
+        snape, albus = self.teachers[1], self.teachers[0]
+
+        with patch.object(models.Teacher, "cache_object_tags", True):
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+            response = self.client.get(url, data={"name": albus.name})
+            self.assertEqual("MISS", response["X-Cache"])
+            response = self.client.get(f"{url}/{albus.pk}")
+            self.assertEqual("MISS", response["X-Cache"])
+            etag = response["ETag"]
+            response = self.client.get(f"{url}/{snape.pk}")
+            self.assertEqual("MISS", response["X-Cache"])
+
+            snape.name = "Severus Snape, the Half-Blood Prince"
+            snape.save()
+
+            response = self.client.get(f"{url}/{albus.pk}", HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+            self.assertEqual("HIT", response["X-Cache"])
+            response = self.client.get(url, data={"name": albus.name})
+            self.assertEqual("HIT", response["X-Cache"])
+
+            response = self.client.get(f"{url}/{snape.pk}")
+            self.assertEqual("MISS", response["X-Cache"])
+            self.assertEqual(snape.name, response.json()["name"])
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+            self.assertIn(snape.name, [item["name"] for item in response.json()["results"]])
+
+            response = self.client.get(f"{url}/{snape.pk}")
+            self.assertEqual("HIT", response["X-Cache"])
+
+    def test_object_tags_on_create(self):
+        url = self.url
+
+        with patch.object(models.Teacher, "cache_object_tags", True):
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+
+            models.Teacher.objects.create(name="Remus Lupin")
+
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+            self.assertIn("Remus Lupin", [item["name"] for item in response.json()["results"]])
+
+    def test_batch_cache_invalidation(self):
+        url = self.url
+        snape, albus = self.teachers[1], self.teachers[0]
+
+        with patch.object(models.Teacher, "cache_object_tags", True):
+            for teacher in (albus, snape):
+                response = self.client.get(f"{url}/{teacher.pk}")
+                self.assertEqual("MISS", response["X-Cache"])
+
+            with (
+                patch("drf_kit.cache._bump_generation", wraps=_bump_generation) as bump,
+                batch_cache_invalidation(),
+            ):
+                for teacher in (albus, snape):
+                    teacher.name = teacher.name.upper()
+                    teacher.save()
+
+                response = self.client.get(f"{url}/{snape.pk}")
+                self.assertEqual("HIT", response["X-Cache"])
+
+            self.assertEqual(1, bump.call_count)
+            for teacher in (albus, snape):
+                response = self.client.get(f"{url}/{teacher.pk}")
+                self.assertEqual("MISS", response["X-Cache"])
+                self.assertEqual(teacher.name, response.json()["name"])
+
+    def test_negative_cache(self):
+        url = f"{self.url}/666"
+        now = timezone.now()
+
+        response = self.client.get(url)
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+        self.assertNotIn("X-Cache", response)
+
+        with (
+            patch.object(views.TeacherViewSet, "cache_negative_timeout", 5),
+            patch.object(views.TeacherViewSet, "cache_stale_timeout", 60),
+        ):
+            with self.patch_time(some_date=now):
+                response = self.client.get(url)
+                self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+                self.assertEqual("MISS", response["X-Cache"])
+
+                with self.assertNumQueries(0):
+                    response = self.client.get(url)
+                self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+                self.assertEqual("HIT", response["X-Cache"])
+
+            with self.patch_time(some_date=now + timedelta(seconds=10)):
+                response = self.client.get(url, HTTP_CACHE_CONTROL="max-age=5")
+                self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+                self.assertEqual("MISS", response["X-Cache"])
+
+    def test_negative_cache_invalidated_by_create(self):
+        with patch.object(views.TeacherViewSet, "cache_negative_timeout", 5):
+            response = self.client.get(f"{self.url}/666")
+            self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+            teacher = models.Teacher.objects.create(name="Remus Lupin")
+
+            response = self.client.get(f"{self.url}/{teacher.pk}")
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+    def test_empty_cache(self):
+        url = self.url
+        now = timezone.now()
+
+        with patch.object(views.TeacherViewSet, "cache_empty_timeout", 5), self.patch_time(some_date=now):
+            response = self.client.get(url, data={"name": "Gilderoy Lockhart"})
+            self.assertEqual([], response.json()["results"])
+            self.assertEqual("MISS", response["X-Cache"])
+            self.assertEqual(
+                handlers.format_date_time((now + timedelta(seconds=5)).timestamp()),
+                response["Expires"],
+            )
+
+            response = self.client.get(url)
+            self.assertEqual(
+                handlers.format_date_time((now + timedelta(seconds=300)).timestamp()),
+                response["Expires"],
+            )
+
+    def test_stale_while_revalidate(self):
+        url = self.url
+        executor = ThreadPoolExecutor(max_workers=1)
+
+        with (
+            patch.object(views.TeacherViewSet, "cache_stale_timeout", 60),
+            patch("drf_kit.cache._get_refresh_executor", return_value=executor),
+        ):
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+
+            models.Teacher.objects.filter(pk=self.teachers[0].pk).update(name="Gilderoy Lockhart")
+
+            with self.patch_time(some_date=timezone.now() + timedelta(seconds=301)):
+                stale_response = self.client.get(url)
+                self.assertEqual("STALE", stale_response["X-Cache"])
+                self.assertEqual(response.json(), stale_response.json())
+
+                stale_response = self.client.get(url)
+                self.assertEqual("STALE", stale_response["X-Cache"])
+
+                executor.shutdown(wait=True)
+
+            cached_response = self.client.get(url)
+            self.assertEqual("HIT", cached_response["X-Cache"])
+            self.assertIn("Gilderoy Lockhart", [item["name"] for item in cached_response.json()["results"]])
+
+    def test_ttl_jitter(self):
+        url = self.url
+        now = timezone.now()
+
+        with (
+            patch.object(views.TeacherViewSet, "cache_ttl_jitter", 0.1),
+            patch("drf_kit.cache.random.uniform", return_value=0.1) as uniform,
+            self.patch_time(some_date=now),
+        ):
+            response = self.client.get(url, HTTP_CACHE_CONTROL="no-cache")
+
+        uniform.assert_called_once_with(0, 0.1)
+        self.assertEqual("max-age=270", response["Cache-Control"])
+        self.assertEqual(handlers.format_date_time((now + timedelta(seconds=270)).timestamp()), response["Expires"])
+
+    def test_early_refresh(self):
+        url = self.url
+        executor = ThreadPoolExecutor(max_workers=1)
+        now = timezone.now()
+
+        with (
+            patch.object(views.TeacherViewSet, "cache_early_refresh", 1.0),
+            patch("drf_kit.cache._get_refresh_executor", return_value=executor),
+        ):
+            with self.patch_time(some_date=now):
+                response = self.client.get(url)
+                self.assertEqual("MISS", response["X-Cache"])
+
+            models.Teacher.objects.filter(pk=self.teachers[0].pk).update(name="Gilderoy Lockhart")
+
+            with self.patch_time(some_date=now + timedelta(seconds=299, milliseconds=999)):
+                with patch("drf_kit.cache.random.random", return_value=0.999999999999):
+                    response = self.client.get(url)
+                    self.assertEqual("HIT", response["X-Cache"])
+                    self.assertNotIn("Gilderoy Lockhart", [item["name"] for item in response.json()["results"]])
+
+                executor.shutdown(wait=True)
+
+                with patch("drf_kit.cache.random.random", return_value=0):
+                    response = self.client.get(url)
+                self.assertEqual("HIT", response["X-Cache"])
+                self.assertIn("Gilderoy Lockhart", [item["name"] for item in response.json()["results"]])
+
+    def test_early_refresh_unlikely(self):
+        url = self.url
+        now = timezone.now()
+
+        with patch.object(views.TeacherViewSet, "cache_early_refresh", 1.0):
+            with self.patch_time(some_date=now):
+                self.client.get(url)
+
+            with (
+                self.patch_time(some_date=now + timedelta(seconds=60)),
+                patch("drf_kit.cache.CacheResponse.schedule_refresh") as schedule_refresh,
+            ):
+                for _ in range(10):
+                    response = self.client.get(url)
+                    self.assertEqual("HIT", response["X-Cache"])
+
+        schedule_refresh.assert_not_called()
+
+    def test_stale_disabled(self):
+        url = self.url
+
+        response = self.client.get(url)
+        self.assertEqual("MISS", response["X-Cache"])
+
+        with self.patch_time(some_date=timezone.now() + timedelta(seconds=301)):
+            response = self.client.get(url)
+            self.assertEqual("HIT", response["X-Cache"])
+
+    def _calculate_cache_key(self, url):
+        key_method = CacheResponse().calculate_key
+        with patch("drf_kit.cache.CacheResponse.calculate_key", wraps=key_method) as calc:
+            response = self.client.get(url)
+            call_kwargs = calc.mock_calls[0][2]
+            return key_method(**call_kwargs), response
+
+    def test_compact_entry(self):
+        url = self.url
+        key, response = self._calculate_cache_key(url=url)
+
+        entry = cache.get(key)
+        self.assertIsInstance(entry, bytes)
+        self.assertTrue(entry.startswith(b"DK\x01"))
+        self.assertTrue(entry.endswith(response.content))
+
+        cached_response = self.client.get(url)
+        self.assertEqual("HIT", cached_response["X-Cache"])
+        self.assertEqual(response.content, cached_response.content)
+        self.assertEqual(response["Content-Type"], cached_response["Content-Type"])
+        self.assertEqual(response["ETag"], cached_response["ETag"])
+
+    def test_legacy_tuple_entry(self):
+        url = self.url
+        key, response = self._calculate_cache_key(url=url)
+
+        headers = response.headers.copy()
+        for entry in [
+            (response.content, response.status_code, headers),
+            (response.content, response.status_code, headers, {"created_at": timezone.now().timestamp()}),
+        ]:
+            cache.set(key, entry)
+
+            cached_response = self.client.get(url)
+            self.assertEqual("HIT", cached_response["X-Cache"])
+            self.assertEqual(response.content, cached_response.content)
+            self.assertEqual(response["Content-Type"], cached_response["Content-Type"])
+
+    def test_unknown_entry_layout(self):
+        url = self.url
+        key, _ = self._calculate_cache_key(url=url)
+
+        cache.set(key, b"DK\x09" + b"\x00" * 16)
+
+        response = self.client.get(url)
+        self.assertEqual("MISS", response["X-Cache"])
+
+    def test_chunked_entry(self):
+        url = self.url
+
+        with patch.object(toolkit_api_settings, "CACHE_CHUNK_SIZE", 100):
+            key, response = self._calculate_cache_key(url=url)
+            self.assertEqual("MISS", response["X-Cache"])
+
+            manifest = cache.get(key)
+            self.assertFalse(manifest.endswith(response.content))
+
+            cached_response = self.client.get(url)
+            self.assertEqual("HIT", cached_response["X-Cache"])
+            self.assertTrue(cached_response.streaming)
+            chunks = list(cached_response.streaming_content)
+            self.assertEqual(math.ceil(len(response.content) / 100), len(chunks))
+            self.assertEqual(response.content, b"".join(chunks))
+            self.assertEqual(response["ETag"], cached_response["ETag"])
+
+    def test_chunked_entry_compressed(self):
+        url = self.url
+
+        with (
+            patch.object(toolkit_api_settings, "CACHE_CHUNK_SIZE", 100),
+            patch.object(views.TeacherViewSet, "cache_compression", "gzip"),
+        ):
+            response = self.client.get(url)
+
+            compressed_response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+            self.assertEqual("gzip", compressed_response["Content-Encoding"])
+            self.assertEqual(response.content, gzip.decompress(b"".join(compressed_response.streaming_content)))
+
+            plain_response = self.client.get(url)
+            self.assertEqual("HIT", plain_response["X-Cache"])
+            self.assertEqual(response.content, plain_response.content)
+
+    def test_chunked_entry_evicted(self):
+        url = self.url
+
+        with patch.object(toolkit_api_settings, "CACHE_CHUNK_SIZE", 100):
+            key, _ = self._calculate_cache_key(url=url)
+
+            chunk_keys = _get_chunk_keys(key=key, chunks=_decode_entry(entry=cache.get(key))[3]["chunks"])
+            self.assertLess(1, len(chunk_keys))
+            cache.delete(chunk_keys[-1])
+
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+
+    def test_entry_above_max_size(self):
+        url = self.url
+
+        with patch.object(toolkit_api_settings, "CACHE_MAX_ENTRY_SIZE", 100):
+            key, response = self._calculate_cache_key(url=url)
+            self.assertEqual("MISS", response["X-Cache"])
+            self.assertIsNone(cache.get(key))
+
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+
+            response = self.client.get(url, data={"name": "Gilderoy Lockhart"})
+            response = self.client.get(url, data={"name": "Gilderoy Lockhart"})
+            self.assertEqual("HIT", response["X-Cache"])
+
+    def test_single_flight_waits_for_other_worker(self):
+        url = self.url
+        key, response = self._calculate_cache_key(url=url)
+        response_dict = cache.get(key)
+
+        cache.delete(key)
+        cache.add(f"{key}:lock", True)  # another worker is rebuilding the entry
+
+        def _other_worker_finishes(*args):
+            cache.set(key, response_dict)
+
+        with (
+            patch.object(views.TeacherViewSet, "cache_lock_timeout", 10),
+            patch("drf_kit.cache.time.sleep", side_effect=_other_worker_finishes) as sleep,
+            self.assertNumQueries(0),
+        ):
+            cached_response = self.client.get(url)
+
+        self.assertEqual(1, sleep.call_count)
+        self.assertEqual("HIT", cached_response["X-Cache"])
+        self.assertEqual(response.json(), cached_response.json())
+
+    def test_single_flight_stops_waiting_without_entry(self):
+        url = f"{self.url}?id=abc"
+        key, response = self._calculate_cache_key(url=url)
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+        cache.add(f"{key}:lock", True)  # another worker is rebuilding the entry
+
+        def _other_worker_fails(*args):
+            cache.delete(f"{key}:lock")
+
+        with (
+            patch.object(views.TeacherViewSet, "cache_lock_timeout", 10),
+            patch("drf_kit.cache.time.sleep", side_effect=_other_worker_fails) as sleep,
+        ):
+            response = self.client.get(url)
+
+        self.assertEqual(1, sleep.call_count)
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_single_flight_with_cache_lock_without_entry(self):
+        url = f"{self.url}?id=abc"
+        events = []
+        fill_cache = CacheResponse.fill_cache
+
+        def _fill_cache(*args, **kwargs):
+            events.append("fill")
+            return fill_cache(*args, **kwargs)
+
+        with (
+            patch.object(views.TeacherViewSet, "cache_lock_timeout", 10),
+            patch.object(CacheResponse, "fill_cache", autospec=True, side_effect=_fill_cache),
+            self.patch_cache_lock(unlock_side_effect=lambda: events.append("unlock")),
+        ):
+            key, response = self._calculate_cache_key(url=url)
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+            self.assertTrue(cache.get(f"{key}:unfilled"))
+            self.assertEqual(["fill"], events)
+
+            events.clear()
+            response = self.client.get(url)
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+            # Not rebuilt while holding the lock, so that the other workers don't wait for it
+            self.assertEqual(["unlock", "fill"], events)
+
+    def test_single_flight_releases_lock(self):
+        url = self.url
+
+        with patch.object(views.TeacherViewSet, "cache_lock_timeout", 10):
+            key, response = self._calculate_cache_key(url=url)
+
+        self.assertEqual("MISS", response["X-Cache"])
+        self.assertIsNone(cache.get(f"{key}:lock"))
+
+    def test_single_flight_with_cache_lock(self):
+        url = self.url
+
+        with patch.object(views.TeacherViewSet, "cache_lock_timeout", 10), self.patch_cache_lock() as lock:
+            key, response = self._calculate_cache_key(url=url)
+
+        self.assertEqual("MISS", response["X-Cache"])
+        lock.assert_called_with(f"{key}:lock", timeout=10, blocking_timeout=10)
+
+    def test_etag(self):
+        url = self.url
+
+        response = self.client.get(url)
+        self.assertEqual("MISS", response["X-Cache"])
+        etag = response["ETag"]
+
+        cached_response = self.client.get(url)
+        self.assertEqual("HIT", cached_response["X-Cache"])
+        self.assertEqual(etag, cached_response["ETag"])
+
+    def test_if_none_match(self):
+        url = self.url
+
+        response = self.client.get(url)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, not_modified.status_code)
+        self.assertEqual(b"", not_modified.content)
+        self.assertEqual(etag, not_modified["ETag"])
+        self.assertEqual("HIT", not_modified["X-Cache"])
+
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=f'"outdated", W/{etag}')
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, not_modified.status_code)
+
+        modified = self.client.get(url, HTTP_IF_NONE_MATCH='"outdated"')
+        self.assertEqual(status.HTTP_200_OK, modified.status_code)
+        self.assertEqual(response.content, modified.content)
+
+    def test_if_none_match_after_write(self):
+        url = self.url
+
+        response = self.client.get(url)
+        etag = response["ETag"]
+
+        self.teachers[0].name = "Quirinus Quirrell"
+        self.teachers[0].save()
+
+        modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, modified.status_code)
+        self.assertEqual("MISS", modified["X-Cache"])
+        self.assertNotEqual(etag, modified["ETag"])
+
+    def test_if_none_match_on_miss(self):
+        url = self.url
+
+        response = self.client.get(url)
+        etag = response["ETag"]
+        cache.clear()
+
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, not_modified.status_code)
+        self.assertEqual("MISS", not_modified["X-Cache"])
+
+    def test_if_none_match_while_stale(self):
+        url = self.url
+        executor = ThreadPoolExecutor(max_workers=1)
+
+        with (
+            patch.object(views.TeacherViewSet, "cache_stale_timeout", 60),
+            patch("drf_kit.cache._get_refresh_executor", return_value=executor),
+        ):
+            response = self.client.get(url)
+            etag = response["ETag"]
+
+            models.Teacher.objects.filter(pk=self.teachers[0].pk).update(name="Gilderoy Lockhart")
+
+            with self.patch_time(some_date=timezone.now() + timedelta(seconds=301)):
+                not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(status.HTTP_304_NOT_MODIFIED, not_modified.status_code)
+                self.assertEqual("STALE", not_modified["X-Cache"])
+
+                executor.shutdown(wait=True)
+
+            modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(status.HTTP_200_OK, modified.status_code)
+            self.assertEqual("HIT", modified["X-Cache"])
+            self.assertIn("Gilderoy Lockhart", [item["name"] for item in modified.json()["results"]])
+
+    def test_compressed_entry(self):
+        url = self.url
+
+        with patch.object(views.TeacherViewSet, "cache_compression", "gzip"):
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+            self.assertFalse(response.has_header("Content-Encoding"))
+
+            compressed_response = self.client.get(url, HTTP_ACCEPT_ENCODING="br;q=1.0, gzip;q=0.8")
+            self.assertEqual("HIT", compressed_response["X-Cache"])
+            self.assertEqual("gzip", compressed_response["Content-Encoding"])
+            self.assertIn("Accept-Encoding", compressed_response["Vary"])
+            self.assertEqual(f"W/{response['ETag']}", compressed_response["ETag"])
+            self.assertEqual(response.content, gzip.decompress(compressed_response.content))
+
+            plain_response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip;q=0, identity")
+            self.assertEqual("HIT", plain_response["X-Cache"])
+            self.assertFalse(plain_response.has_header("Content-Encoding"))
+            self.assertEqual(response.content, plain_response.content)
+
+    def test_compressed_entry_wildcard_encoding(self):
+        url = self.url
+
+        with patch.object(views.TeacherViewSet, "cache_compression", "gzip"):
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+
+            compressed_response = self.client.get(url, HTTP_ACCEPT_ENCODING="*;q=0, gzip")
+            self.assertEqual("gzip", compressed_response["Content-Encoding"])
+            self.assertEqual(response.content, gzip.decompress(compressed_response.content))
+
+            compressed_response = self.client.get(url, HTTP_ACCEPT_ENCODING="br, *")
+            self.assertEqual("gzip", compressed_response["Content-Encoding"])
+
+            plain_response = self.client.get(url, HTTP_ACCEPT_ENCODING="*, gzip;q=0")
+            self.assertFalse(plain_response.has_header("Content-Encoding"))
+            self.assertEqual(response.content, plain_response.content)
+
+    def test_compression_not_available(self):
+        url = self.url
+
+        with (
+            patch.object(views.TeacherViewSet, "cache_compression", "lzma"),
+            self.assertRaisesMessage(ImproperlyConfigured, "Unsupported cache compression: lzma"),
+        ):
+            self.client.get(url)
+
+    def test_local_cache_tier(self):
+        url = self.url
+
+        with patch.object(views.TeacherViewSet, "cache_local_timeout", 5):
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+            self.assertFalse(response.has_header("X-Cache-Tier"))
+
+            local_response = self.client.get(url)
+            self.assertEqual("HIT", local_response["X-Cache"])
+            self.assertEqual("local", local_response["X-Cache-Tier"])
+            self.assertEqual(response.content, local_response.content)
+
+            get_local_cache().clear()
+
+            shared_response = self.client.get(url)
+            self.assertEqual("HIT", shared_response["X-Cache"])
+            self.assertEqual("shared", shared_response["X-Cache-Tier"])
+
+            local_response = self.client.get(url)
+            self.assertEqual("local", local_response["X-Cache-Tier"])
+
+    def test_local_cache_tier_after_write(self):
+        url = self.url
+
+        with patch.object(views.TeacherViewSet, "cache_local_timeout", 5):
+            self.client.get(url)
+
+            self.teachers[0].name = "Remus Lupin"
+            self.teachers[0].save()
+
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+            self.assertIn("Remus Lupin", [item["name"] for item in response.json()["results"]])
+
+    def test_local_cache_tier_invalidated_by_object_tags(self):
+        url = f"{self.url}/{self.teachers[1].pk}"
+        snape = self.teachers[1]
+
+        with (
+            patch.object(models.Teacher, "cache_object_tags", True),
+            patch.object(views.TeacherViewSet, "cache_local_timeout", 5),
+        ):
+            key, response = self._calculate_cache_key(url=url)
+            outdated = get_local_cache().get(key)
+
+            snape.name = "Severus Snape, the Half-Blood Prince"
+            snape.save()
+
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+
+            # Another worker rebuilt the shared entry, while this one still has its outdated copy
+            get_local_cache().set(key, outdated, timeout=5)
+
+            response = self.client.get(url)
+            self.assertEqual("HIT", response["X-Cache"])
+            self.assertEqual("shared", response["X-Cache-Tier"])
+            self.assertEqual(snape.name, response.json()["name"])
+            self.assertIsNotNone(cache.get(key))
+
+    def test_canonical_query_params(self):
+        url = self.url
+        ids = f"id={self.teachers[0].pk}&id={self.teachers[1].pk}"
+        reversed_ids = f"id={self.teachers[1].pk}&id={self.teachers[0].pk}"
+
+        with patch.object(views.TeacherViewSet, "cache_key_constructor", canonical_cache_key_constructor):
+            response = self.client.get(f"{url}?{ids}")
+            self.assertEqual("MISS", response["X-Cache"])
+
+            response = self.client.get(f"{url}?{reversed_ids}&utm_source=owl")
+            self.assertEqual("HIT", response["X-Cache"])
+
+            response = self.client.get(f"{url}?{ids}&page=1&include_unavailable=0")
+            self.assertEqual("HIT", response["X-Cache"])
+
+            response = self.client.get(f"{url}?{ids}&include_unavailable=1")
+            self.assertEqual("MISS", response["X-Cache"])
+
+            response = self.client.get(f"{url}?{ids}&sort=name")
+            self.assertEqual("MISS", response["X-Cache"])
+
+    def test_canonical_sparse_fields(self):
+        url = self.url
+
+        with patch.object(views.TeacherViewSet, "cache_key_constructor", canonical_cache_key_constructor):
+            response = self.client.get(f"{url}?fields=id,name")
+            self.assertEqual("MISS", response["X-Cache"])
+            self.assertEqual({"id", "name"}, set(response.json()["results"][0]))
+
+            response = self.client.get(f"{url}?fields=name,,id")
+            self.assertEqual("HIT", response["X-Cache"])
+
+            response = self.client.get(f"{url}?fields=name")
+            self.assertEqual("MISS", response["X-Cache"])
+            self.assertEqual({"name"}, set(response.json()["results"][0]))
+
+            response = self.client.get(f"{url}?omit=name")
+            self.assertEqual("MISS", response["X-Cache"])
+            self.assertNotIn("name", response.json()["results"][0])
+
+    def test_canonical_query_params_distinct_filters(self):
+        url = self.url
+
+        with patch.object(views.TeacherViewSet, "cache_key_constructor", canonical_cache_key_constructor):
+            response = self.client.get(f"{url}?name=Severus Snape")
+            self.assertEqual("MISS", response["X-Cache"])
+            self.assertEqual(1, len(response.json()["results"]))
+
+            response = self.client.get(f"{url}?name=Albus Dumbledore")
+            self.assertEqual("MISS", response["X-Cache"])
+            self.assertEqual(1, len(response.json()["results"]))
+
+    def test_canonical_query_params_without_queryset(self):
+        url = self.url
+
+        with (
+            patch.object(views.TeacherViewSet, "cache_key_constructor", canonical_cache_key_constructor),
+            patch.object(CanonicalCacheKeyConstructor.all_query_params, "_view_params", {}),
+            patch.object(views.TeacherViewSet, "queryset", None),
+            patch.object(views.TeacherViewSet, "get_queryset", lambda view: models.Teacher.objects.all()),
+        ):
+            response = self.client.get(f"{url}?name=Severus Snape")
+            self.assertEqual("MISS", response["X-Cache"])
+            self.assertEqual(1, len(response.json()["results"]))
+
+            response = self.client.get(f"{url}?name=Albus Dumbledore")
+            self.assertEqual("MISS", response["X-Cache"])
+            self.assertEqual(1, len(response.json()["results"]))
+
+            response = self.client.get(f"{url}?name=Albus Dumbledore&utm_source=owl")
+            self.assertEqual("HIT", response["X-Cache"])
+
+    def test_canonical_query_params_unresolved_filters(self):
+        key_bit = CanonicalQueryParamsKeyBit()
+        request = Mock(
+            query_params=QueryDict("name=Albus Dumbledore&utm_source=owl"), accepted_media_type="application/json"
+        )
+        view = Mock(spec=["get_queryset"], get_queryset=Mock(side_effect=ValueError))
+
+        with self.assertLogs(level="WARNING"):
+            data = key_bit.get_data(
+                params=None, view_instance=view, view_method=Mock(__name__="list"), request=request, args=(), kwargs={}
+            )
+
+        expected = {"name": ["Albus Dumbledore"], "utm_source": ["owl"], "renderer_type": "application/json"}
+        self.assertEqual(expected, data)
+
+    def test_canonical_body(self):
+        url = f"{self.url}/search"
+        ids = [self.teachers[0].pk, self.teachers[1].pk]
+
+        response = self.client.post(url, data={"id": ids, "name": "Albus Dumbledore"})
+        self.assertEqual("MISS", response["X-Cache"])
+
+        response = self.client.post(url, data={"name": "Albus Dumbledore", "id": [str(pk) for pk in reversed(ids)]})
+        self.assertEqual("HIT", response["X-Cache"])
+
+        response = self.client.post(url, data={"id": ids, "name": "Severus Snape"})
+        self.assertEqual("MISS", response["X-Cache"])
+
+    def test_canonical_body_null(self):
+        url = f"{self.url}/search"
+        models.Teacher.objects.create(name="None")
+
+        response = self.client.post(url, data={"name": None}, format="json")
+        self.assertEqual("MISS", response["X-Cache"])
+        self.assertEqual(len(self.teachers) + 1, response.json()["count"])
+
+        response = self.client.post(url, data={"name": "None"}, format="json")
+        self.assertEqual("MISS", response["X-Cache"])
+        self.assertEqual(["None"], [item["name"] for item in response.json()["results"]])
+
+    def test_canonical_body_null_values(self):
+        key_bit = CanonicalBodyKeyBit()
+        view = views.TeacherViewSet(action="search", args=(), kwargs={})
+
+        def _get_key(body):
+            return key_bit.get_data(
+                params=None,
+                view_instance=view,
+                view_method=Mock(__name__="search"),
+                request=Mock(data=body),
+                args=(),
+                kwargs={},
+            )
+
+        self.assertEqual(_get_key(body={"id": [1, None]}), _get_key(body={"id": [None, 1]}))
+        self.assertNotEqual(_get_key(body={"id": [1, None]}), _get_key(body={"id": [1, "None"]}))
+
+    def test_canonical_body_unresolved_filters(self):
+        key_bit = CanonicalBodyKeyBit()
+        view = Mock(spec=["get_queryset"], get_queryset=Mock(side_effect=ValueError))
+
+        def _get_key(body):
+            return key_bit.get_data(
+                params=None,
+                view_instance=view,
+                view_method=Mock(__name__="search"),
+                request=Mock(data=body, query_params=QueryDict()),
+                args=(),
+                kwargs={},
+            )
+
+        with self.assertLogs(level="WARNING"):
+            key = _get_key(body={"name": "Albus Dumbledore", "id": [1, 2]})
+
+        # Without the filterset, no filter is known to be order-insensitive
+        self.assertEqual(key, _get_key(body={"id": [1, 2], "name": "Albus Dumbledore"}))
+        self.assertNotEqual(key, _get_key(body={"name": "Albus Dumbledore", "id": [2, 1]}))
+
+    def test_user_partition(self):
+        url = self.url
+        albus = User.objects.create_user(username="albus")
+        minerva = User.objects.create_user(username="minerva")
+
+        with patch.object(views.TeacherViewSet, "cache_key_constructor", user_cache_key_constructor):
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+
+            self.client.force_authenticate(user=albus)
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+            response = self.client.get(url)
+            self.assertEqual("HIT", response["X-Cache"])
+
+            self.client.force_authenticate(user=minerva)
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+
+            bump_partition_generation(partition=f"user:{albus.pk}")
+
+            response = self.client.get(url)
+            self.assertEqual("HIT", response["X-Cache"])
+
+            self.client.force_authenticate(user=albus)
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+
+    def test_group_partition(self):
+        url = self.url
+        staff = Group.objects.create(name="staff")
+        albus = User.objects.create_user(username="albus")
+        minerva = User.objects.create_user(username="minerva")
+        albus.groups.add(staff)
+        minerva.groups.add(staff)
+
+        with patch.object(views.TeacherViewSet, "cache_key_constructor", group_cache_key_constructor):
+            self.client.force_authenticate(user=albus)
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+
+            self.client.force_authenticate(user=minerva)
+            response = self.client.get(url)
+            self.assertEqual("HIT", response["X-Cache"])
+
+            bump_partition_generation(partition=f"group:{staff.pk}")
+
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+
+    def test_user_partition_search(self):
+        url = f"{self.url}/search"
+        search = {"id": [self.teachers[0].pk, self.teachers[1].pk]}
+        albus = User.objects.create_user(username=self.teachers[0].name)
+        severus = User.objects.create_user(username=self.teachers[1].name)
+
+        def _get_queryset(view):
+            return models.Teacher.objects.filter(name=view.request.user.username)
+
+        with (
+            patch.object(views.TeacherViewSet, "cache_key_constructor", user_cache_key_constructor),
+            patch.object(views.TeacherViewSet, "get_queryset", _get_queryset),
+        ):
+            self.client.force_authenticate(user=albus)
+            response = self.client.post(url, data=search)
+            self.assertEqual("MISS", response["X-Cache"])
+            self.assertEqual([albus.username], [item["name"] for item in response.json()["results"]])
+
+            self.client.force_authenticate(user=severus)
+            response = self.client.post(url, data=search)
+            self.assertEqual("MISS", response["X-Cache"])
+            self.assertEqual([severus.username], [item["name"] for item in response.json()["results"]])
+
+            response = self.client.post(url, data=search)
+            self.assertEqual("HIT", response["X-Cache"])
+
+            bump_partition_generation(partition=f"user:{severus.pk}")
+
+            response = self.client.post(url, data=search)
+            self.assertEqual("MISS", response["X-Cache"])
+
+    def test_custom_partition(self):
+        url = self.url
+
+        class TenantCacheKeyConstructor(CacheKeyConstructor):
+            partition = PartitionKeyBit(partition_func=lambda request: f"tenant:{request.headers.get('X-Tenant')}")
+
+        with patch.object(views.TeacherViewSet, "cache_key_constructor", TenantCacheKeyConstructor()):
+            response = self.client.get(url, HTTP_X_TENANT="hogwarts")
+            self.assertEqual("MISS", response["X-Cache"])
+
+            response = self.client.get(url, HTTP_X_TENANT="durmstrang")
+            self.assertEqual("MISS", response["X-Cache"])
+
+            response = self.client.get(url, HTTP_X_TENANT="hogwarts")
+            self.assertEqual("HIT", response["X-Cache"])
+
+    def restart(self):
+        # Fingerprints are computed again, as in a new process
+        return patch.object(CacheKeyConstructor.schema, "_fingerprints", {})
+
+    def test_schema_unchanged_after_deploy(self):
+        url = self.url
+
+        with self.restart():
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+
+        with self.restart():
+            response = self.client.get(url)
+            self.assertEqual("HIT", response["X-Cache"])
+
+    def test_schema_changed_after_deploy(self):
+        url = self.url
+
+        class TeacherSerializer(serializers.TeacherSerializer):
+            class Meta(serializers.TeacherSerializer.Meta):
+                fields = ("id", "name")
+
+        with self.restart():
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+
+        with self.restart(), patch.object(views.TeacherViewSet, "serializer_class", TeacherSerializer):
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+            self.assertEqual({"id", "name"}, set(response.json()["results"][0]))
+
+        with self.restart(), patch.object(views.TeacherViewSet, "renderer_classes", [JSONRenderer]):
+            response = self.client.get(url)
+            self.assertEqual("MISS", response["X-Cache"])
+
+    def test_schema_fingerprint_computed_once(self):
+        with (
+            self.restart(),
+            patch.object(SchemaKeyBit, "get_schema", wraps=CacheKeyConstructor.schema.get_schema) as get_schema,
+        ):
+            self.client.get(self.url)
+            self.client.get(self.url, {"page": 2})
+
+        get_schema.assert_called_once()
+
+    def test_schema_fingerprint_per_serializers(self):
+        key_bit = SchemaKeyBit()
+        factory = APIRequestFactory()
+
+        def _get_fingerprint(query):
+            request = Request(factory.get("/houses", query))
+            view = views.HouseViewSet(action="list", request=request, format_kwarg=None, args=(), kwargs={})
+            return key_bit.get_data(
+                params=None, view_instance=view, view_method=Mock(__name__="list"), request=request, args=(), kwargs={}
+            )
+
+        fingerprint = _get_fingerprint(query={})
+        stats_fingerprint = _get_fingerprint(query={"stats": 1})
+        self.assertNotEqual(fingerprint, stats_fingerprint)
+        self.assertEqual(fingerprint, _get_fingerprint(query={"stats": 0}))
+        self.assertEqual(stats_fingerprint, _get_fingerprint(query={"stats": 1}))
+
+
+class TestWarmCache(HogwartsTestMixin, BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        self._set_up_teachers()
+
+    def test_warm_up(self):
+        config = {
+            "teacher": {
+                "pages": 2,
+                "filters": [{"name": "Albus Dumbledore"}],
+                "ids": [self.teachers[0].pk],
+            },
+        }
+
+        out = StringIO()
+        with patch.object(toolkit_api_settings, "CACHE_WARMUP", config):
+            call_command("warm_cache", stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("teacher-list GET /teachers 200 MISS", output)
+        self.assertIn("teacher-list GET /teachers?page=2 404 -", output)
+        self.assertIn("teacher-list GET /teachers?name=Albus+Dumbledore 200 MISS", output)
+        self.assertIn(f"teacher-detail GET /teachers/{self.teachers[0].pk} 200 MISS", output)
+        self.assertIn("teacher-list: 4 requests", output)
+        self.assertNotIn("house-to-wizard", output)
+
+        response = self.client.get("/teachers")
+        self.assertEqual("HIT", response["X-Cache"])
+
+        response = self.client.get("/teachers", data={"name": "Albus Dumbledore"})
+        self.assertEqual("HIT", response["X-Cache"])
+
+        response = self.client.get(f"/teachers/{self.teachers[0].pk}")
+        self.assertEqual("HIT", response["X-Cache"])
+
+        response = self.client.get(f"/teachers/{self.teachers[1].pk}")
+        self.assertEqual("MISS", response["X-Cache"])
+
+    def test_warm_up_from_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as config:
+            json.dump({"teacher": {"ids": [self.teachers[1].pk]}}, config)
+            config.flush()
+
+            call_command("warm_cache", config=config.name, host="hogwarts.edu", stdout=StringIO())
+
+        response = self.client.get(f"/teachers/{self.teachers[1].pk}")
+        self.assertEqual("HIT", response["X-Cache"])
+
+    def test_invalid_config_file(self):
+        with self.assertRaises(CommandError):
+            call_command("warm_cache", config="/not/a/config.json", stdout=StringIO())
+
+
+class TestCacheMetrics(HogwartsTestMixin, BaseApiTest):
+    url = "/cache-metrics"
+
+    def setUp(self):
+        super().setUp()
+        self._set_up_teachers()
+        user = User.objects.create_superuser(username="albus", password="lemon-drop")
+        self.client.force_authenticate(user=user)
+
+    def test_record_metrics(self):
+        self.client.get("/teachers")
+        self.client.get("/teachers")
+        self.client.get(f"/teachers/{self.teachers[0].pk}")
+
+        response = self.client.get(self.url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        stats = response.json()
+        listed = stats["TeacherViewSet.list"]
+        self.assertEqual(1, listed["hit"])
+        self.assertEqual(1, listed["miss"])
+        self.assertEqual(0.5, listed["hit_ratio"])
+        self.assertEqual(1, listed["fills"])
+        self.assertEqual(2, listed["gets"])
+        self.assertEqual(1, listed["sets"])
+        self.assertLess(0, listed["avg_fill_time"])
+        self.assertLess(0, listed["avg_size"])
+        self.assertEqual(listed["rendered_size"], listed["size"])
+
+        retrieved = stats["TeacherViewSet.retrieve"]
+        self.assertEqual(1, retrieved["miss"])
+        self.assertEqual(0, retrieved["hit_ratio"])
+
+    def test_exporter(self):
+        exporter = Mock()
+        with patch.object(toolkit_api_settings, "CACHE_METRICS_EXPORTER", exporter):
+            self.client.get("/teachers")
+
+        exporter.assert_any_call(view="TeacherViewSet", action="list", miss=1, gets=1, get_time=ANY)
+
+    def test_disabled(self):
+        with patch.object(toolkit_api_settings, "CACHE_METRICS_ENABLED", False):
+            self.client.get("/teachers")
+
+        response = self.client.get(self.url)
+        self.assertEqual({}, response.json())
+
+    def test_clear(self):
+        self.client.get("/teachers")
+
+        response = self.client.delete(self.url)
+        self.assertEqual(status.HTTP_204_NO_CONTENT, response.status_code)
+
+        response = self.client.get(self.url)
+        self.assertEqual({}, response.json())
+
+    def test_admin_only(self):
+        self.client.force_authenticate(user=None)
+
+        response = self.client.get(self.url)
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
+
+class TestLocalCache(BaseApiTest):
+    def _entry(self, content: bytes):
+        return content, 200, [], {}
+
+    def test_evict_least_recently_used(self):
+        local_cache = LocalCache(max_size=10)
+
+        local_cache.set("first", self._entry(content=b"1234"), timeout=60)
+        local_cache.set("second", self._entry(content=b"1234"), timeout=60)
+        self.assertIsNotNone(local_cache.get("first"))
+
+        local_cache.set("third", self._entry(content=b"1234"), timeout=60)
+        self.assertIsNotNone(local_cache.get("first"))
+        self.assertIsNone(local_cache.get("second"))
+        self.assertIsNotNone(local_cache.get("third"))
+        self.assertEqual(8, local_cache.size)
+
+    def test_delete(self):
+        local_cache = LocalCache(max_size=10)
+
+        local_cache.set("first", self._entry(content=b"1234"), timeout=60)
+        local_cache.delete("first")
+        local_cache.delete("missing")
+        self.assertIsNone(local_cache.get("first"))
+        self.assertEqual(0, local_cache.size)
+
+    def test_skip_oversized(self):
+        local_cache = LocalCache(max_size=10)
+
+        local_cache.set("big", self._entry(content=b"12345678901"), timeout=60)
+        self.assertIsNone(local_cache.get("big"))
+        self.assertEqual(0, local_cache.size)
+
+    def test_expire(self):
+        local_cache = LocalCache(max_size=10)
+
+        local_cache.set("first", self._entry(content=b"1234"), timeout=60)
+        with patch("drf_kit.cache.time.monotonic", return_value=time.monotonic() + 61):
+            self.assertIsNone(local_cache.get("first"))
+        self.assertEqual(0, local_cache.size)
+
+
+class TestAvailabilityExpiry(BaseApiTest):
+    url = "/rooms-of-requirement"
+
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        self.room = RoomOfRequirementFactory(starts_at=None, ends_at=self.now + timedelta(minutes=2))
+        self.future_room = RoomOfRequirementFactory(starts_at=self.now + timedelta(minutes=1), ends_at=None)
+
+    def assertExpires(self, seconds, response):
+        self.assertEqual(
+            handlers.format_date_time((self.now + timedelta(seconds=seconds)).timestamp()), response["Expires"]
+        )
+
+    def test_expires_at_next_model_transition(self):
+        with self.patch_time(some_date=self.now):
+            response = self.client.get(self.url, HTTP_CACHE_CONTROL="no-cache")
+
+        self.assertEqual([self.room.pk], [item["id"] for item in response.json()["results"]])
+        self.assertEqual("max-age=60", response["Cache-Control"])
+        self.assertExpires(seconds=60, response=response)
+
+    def test_expires_at_next_instances_transition(self):
+        with (
+            patch.object(views.RoomOfRequirementViewSet, "cache_availability_expiry", "instances"),
+            self.patch_time(some_date=self.now),
+        ):
+            response = self.client.get(self.url)
+
+        self.assertExpires(seconds=120, response=response)
+
+        with (
+            patch.object(views.RoomOfRequirementViewSet, "cache_availability_expiry", "instances"),
+            self.patch_time(some_date=self.now),
+        ):
+            response = self.client.get(f"{self.url}/{self.room.pk}", HTTP_CACHE_CONTROL="no-cache")
+
+        self.assertExpires(seconds=120, response=response)
+
+    def test_expires_after_transition(self):
+        self.now += timedelta(minutes=1)
+
+        with self.patch_time(some_date=self.now):
+            response = self.client.get(self.url)
+
+        self.assertEqual({self.room.pk, self.future_room.pk}, {item["id"] for item in response.json()["results"]})
+        self.assertExpires(seconds=60, response=response)
+
+    def test_transition_beyond_timeout(self):
+        self.now -= timedelta(hours=1)
+
+        with self.patch_time(some_date=self.now):
+            response = self.client.get(self.url)
+
+        self.assertExpires(seconds=CacheResponse().timeout, response=response)
+
+    def test_not_served_stale_past_transition(self):
+        key_method = CacheResponse().calculate_key
+        with (
+            patch.object(views.RoomOfRequirementViewSet, "cache_stale_timeout", 60),
+            patch("drf_kit.cache.CacheResponse.calculate_key", wraps=key_method) as calc,
+            self.patch_time(some_date=self.now),
+        ):
+            self.client.get(self.url)
+            key = key_method(**calc.mock_calls[0][2])
+
+        meta = _decode_entry(entry=cache.get(key))[3]
+        self.assertNotIn("stale_at", meta)
+
+    def test_disabled(self):
+        with (
+            patch.object(views.RoomOfRequirementViewSet, "cache_availability_expiry", None),
+            self.patch_time(some_date=self.now),
+        ):
+            response = self.client.get(self.url)
+
+        self.assertExpires(seconds=CacheResponse().timeout, response=response)
+
+
+class TestModelGeneration(BaseApiTest):
+    def test_bump_on_save(self):
+        generation = get_model_generation(model=models.Wand)
+
+        models.Wand.objects.create(name="Elder Wand")
+        self.assertNotEqual(generation, get_model_generation(model=models.Wand))
+
+    def test_bump_parents_on_save(self):
+        wizard_generation = get_model_generation(model=models.Wizard)
+        teacher_generation = get_model_generation(model=models.Teacher)
+
+        models.Teacher.objects.create(name="Horace Slughorn")
+        self.assertNotEqual(wizard_generation, get_model_generation(model=models.Wizard))
+        self.assertNotEqual(teacher_generation, get_model_generation(model=models.Teacher))
+
+    def test_bump_on_soft_delete_and_undelete(self):
+        memory = MemoryFactory()
+        generation = get_model_generation(model=models.Memory)
+
+        memory.delete()
+        deleted_generation = get_model_generation(model=models.Memory)
+        self.assertNotEqual(generation, deleted_generation)
+
+        memory.undelete()
+        self.assertNotEqual(deleted_generation, get_model_generation(model=models.Memory))
+
+    def test_restart_after_eviction(self):
+        generation = get_model_generation(model=models.Wand)
+
+        cache.clear()
+        self.assertNotEqual(generation, get_model_generation(model=models.Wand))
+
+
+class TestCachedViewWithoutModel(BaseApiTest):
+    class HealthView(APIView):
+        @cache_response()
+        def get(self, request, *args, **kwargs):
+            return Response({"status": "ok"})
+
+    def test_cache_view_without_model(self):
+        view = self.HealthView.as_view()
+        factory = APIRequestFactory()
+
+        response = view(factory.get("/health"))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual("MISS", response["X-Cache"])
+
+        response = view(factory.get("/health"))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual("HIT", response["X-Cache"])
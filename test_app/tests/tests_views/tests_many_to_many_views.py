@@ -1,9 +1,11 @@
-from unittest.mock import ANY
+from unittest.mock import ANY, patch
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 
 from drf_kit.tests import BaseApiTest
-from test_app import models
+from test_app import models, serializers, views
 from test_app.tests.tests_base import HogwartsTestMixin
 
 
@@ -24,6 +26,122 @@ class TestManyToManyView(HogwartsTestMixin, BaseApiTest):
         expected = list(reversed(self.expected_spell_casts))
         self.assertResponseList(expected_items=expected, response=response)
 
+    def test_list_endpoint_loads_relations_upfront(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        with patch.object(views.SpellCastViewSet, "auto_prefetch", False), self.assertNumQueries(2 + 2 * 4):
+            response = self.client.get(self.url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+    def test_detail_endpoint_loads_relations_upfront(self):
+        url = f"{self.url}/{self.spell_casts[0].pk}"
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+    def test_list_endpoint_inspects_serializer_once(self):
+        class SpellCastSerializer(serializers.SpellCastSerializer):
+            pass
+
+        get_response_fields = views.SpellCastViewSet.get_response_fields
+        with (
+            patch.object(views.SpellCastViewSet, "serializer_class", SpellCastSerializer),
+            patch.object(
+                views.SpellCastViewSet, "get_response_fields", autospec=True, side_effect=get_response_fields
+            ) as inspect,
+        ):
+            for params in ({"fields": "id,wizard"}, {"fields": "id,wizard"}, {"omit": "spell"}, {}):
+                response = self.client.get(self.url, params)
+                self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+                with self.assertNumQueries(2):
+                    self.client.get(self.url, params)
+
+        # Once to tell the readable fields, once to tell how they're loaded
+        self.assertEqual(2, inspect.call_count)
+
+    def test_delete_endpoint_skips_loading_relations(self):
+        url = f"{self.url}/{self.spell_casts[0].pk}"
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(url)
+        self.assertEqual(status.HTTP_204_NO_CONTENT, response.status_code)
+        self.assertNotIn("test_app_wizard", queries[0]["sql"])
+
+    def test_list_endpoint_request_dependent_fields(self):
+        class SpellCastSerializer(serializers.SpellCastSerializer):
+            def get_fields(self):
+                fields = super().get_fields()
+                if self.context["request"].query_params.get("brief"):
+                    del fields["wizard"]
+                return fields
+
+        with patch.object(views.SpellCastViewSet, "serializer_class", SpellCastSerializer):
+            with self.assertNumQueries(2):
+                response = self.client.get(self.url)
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.url, {"brief": "1"})
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+            self.assertNotIn("wizard", response.json()["results"][0])
+            self.assertNotIn("test_app_wizard", queries[1]["sql"])
+
+            response = self.client.get(self.url, {"fields": "id,wizard"})
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+            self.assertEqual({"id", "wizard"}, set(response.json()["results"][0]))
+
+    def test_list_endpoint_uninspectable_serializer(self):
+        class SpellCastSerializer(serializers.SpellCastSerializer):
+            def get_fields(self):
+                if self.instance is None:
+                    raise ValueError("Serializer needs an instance")
+                return super().get_fields()
+
+        with (
+            patch.object(views.SpellCastViewSet, "serializer_class", SpellCastSerializer),
+            self.assertLogs(level="WARNING"),
+        ):
+            response = self.client.get(self.url, {"fields": "id"})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(4, len(response.json()["results"]))
+
+    def test_list_endpoint_sparse_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {"fields": "id,is_successful"})
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        for item in response.json()["results"]:
+            self.assertEqual({"id", "is_successful"}, set(item))
+
+        self.assertEqual(2, len(queries))
+        self.assertNotIn("test_app_wizard", queries[1]["sql"])
+        self.assertNotIn('"test_app_spellcast"."created_at"', queries[1]["sql"])
+
+    def test_list_endpoint_omit_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {"omit": "wizard"})
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        for item in response.json()["results"]:
+            self.assertEqual({"id", "spell", "is_successful"}, set(item))
+
+        self.assertEqual(2, len(queries))
+        self.assertNotIn("test_app_wizard", queries[1]["sql"])
+        self.assertIn("test_app_spell", queries[1]["sql"])
+
+    def test_detail_endpoint_sparse_fields(self):
+        spell_cast = self.spell_casts[0]
+        url = f"{self.url}/{spell_cast.pk}"
+
+        response = self.client.get(url, {"fields": "spell,unknown", "omit": "id"})
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual({"spell": self.expected_spell_casts[0]["spell"]}, response.json())
+
     def test_detail_endpoint(self):
         spell_cast = self.spell_casts[0]
         url = f"{self.url}/{spell_cast.pk}"
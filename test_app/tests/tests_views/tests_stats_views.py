@@ -1,6 +1,9 @@
+from unittest.mock import patch
+
 from rest_framework import status
 
 from drf_kit.tests import BaseApiTest
+from test_app import views
 from test_app.tests.tests_base import HogwartsTestMixin
 
 
@@ -46,3 +49,12 @@ class TestStatsView(HogwartsTestMixin, BaseApiTest):
             expected_body=expected_error,
             response=response,
         )
+
+    def test_stats_parsed_once_per_request(self):
+        url = f"{self.url}?stats=1"
+
+        with patch.object(views.HouseViewSet, "_parse_stats", autospec=True, return_value=True) as parse_stats:
+            response = self.client.get(url)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        parse_stats.assert_called_once()
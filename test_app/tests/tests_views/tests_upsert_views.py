@@ -1,5 +1,7 @@
 from unittest.mock import ANY
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 
 from drf_kit.tests import BaseApiTest
@@ -24,6 +26,19 @@ class TestUpsertView(HogwartsTestMixin, BaseApiTest):
         expected = list(self.expected_placements)
         self.assertResponseList(expected_items=expected, response=response)
 
+    def test_list_endpoint_sparse_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {"fields": "id,wizard_id"})
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        for item in response.json()["results"]:
+            self.assertEqual({"id", "wizard_id"}, set(item))
+
+        # Ordered models read their grouping when instantiated, so it's loaded too
+        self.assertEqual(2, len(queries))
+        self.assertIn('"test_app_triwizardplacement"."year"', queries[1]["sql"])
+        self.assertNotIn('"test_app_triwizardplacement"."created_at"', queries[1]["sql"])
+
     def test_detail_endpoint(self):
         house = self.placements[0]
         url = f"{self.url}/{house.pk}"
@@ -1,8 +1,11 @@
-from unittest.mock import ANY
+from unittest.mock import ANY, patch
 
 from rest_framework import status
+from rest_framework.test import APIRequestFactory
 
 from drf_kit.tests import BaseApiTest
+from drf_kit.views import ModelViewSet
+from test_app import models, serializers, views
 from test_app.tests.tests_base import HogwartsTestMixin
 
 
@@ -72,3 +75,79 @@ class TestVeryCustomView(HogwartsTestMixin, BaseApiTest):
         url = f"{self.url}/{wizard.id}"
         response = self.client.delete(url)
         self.assertResponseAccepted(response=response, expected_item="enqueue to be deleted")
+
+    def test_routes_built_with_class(self):
+        routes = views.WizardViewSet._get_routes()
+
+        self.assertEqual(serializers.WizardSerializer, routes["serializer"]["retrieve"])
+        self.assertEqual(serializers.WizardCreatorSerializer, routes["serializer"]["create"])
+        self.assertEqual(serializers.WizardUpdaterSerializer, routes["serializer"]["update"])
+        self.assertEqual(serializers.WizardSerializer, routes["response_serializer"]["create"])
+        self.assertIs(views.WizardViewSet.queryset_detail, routes["queryset"]["retrieve"])
+
+    def test_routes_fallback(self):
+        class WizardViewSet(ModelViewSet):
+            queryset = models.Wizard.objects.all()
+            serializer_class = serializers.WizardShortSerializer
+            serializer_create_class = serializers.WizardCreatorSerializer
+
+        routes = WizardViewSet._get_routes()
+        self.assertIsNone(routes["serializer"]["retrieve"])
+        self.assertEqual(serializers.WizardCreatorSerializer, routes["serializer"]["update"])
+
+    def test_routes_replaced_by_view_arguments(self):
+        view = views.WizardViewSet.as_view(
+            actions={"get": "retrieve"},
+            serializer_detail_class=serializers.WizardShortSerializer,
+        )
+        wizard = self.wizards[3]
+
+        response = view(APIRequestFactory().get(f"{self.url}/{wizard.pk}"), pk=wizard.pk)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual({"name", "is_half_blood", "received_letter_at"}, set(response.data))
+        self.assertEqual(serializers.WizardSerializer, views.WizardViewSet._get_routes()["serializer"]["retrieve"])
+
+    def test_routes_follow_class_attributes_replaced_later(self):
+        wizard = self.wizards[3]
+        url = f"{self.url}/{wizard.pk}"
+
+        response = self.client.get(url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertIn("house", response.json())
+
+        with patch.object(views.WizardViewSet, "serializer_detail_class", serializers.WizardShortSerializer):
+            response = self.client.get(url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual({"name", "is_half_blood", "received_letter_at"}, set(response.json()))
+
+    def test_routes_read_from_properties(self):
+        class WizardViewSet(views.WizardViewSet):
+            @property
+            def serializer_detail_class(self):
+                if self.request.query_params.get("short"):
+                    return serializers.WizardShortSerializer
+                return serializers.WizardSerializer
+
+        view = WizardViewSet.as_view(actions={"get": "retrieve"})
+        wizard = self.wizards[3]
+
+        response = view(APIRequestFactory().get(f"{self.url}/{wizard.pk}", {"short": "1"}), pk=wizard.pk)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual({"name", "is_half_blood", "received_letter_at"}, set(response.data))
+
+        response = view(APIRequestFactory().get(f"{self.url}/{wizard.pk}"), pk=wizard.pk)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertIn("house", response.data)
+
+    def test_action_resolved_once_per_request(self):
+        wizard = self.wizards[3]
+        url = f"{self.url}/{wizard.pk}"
+
+        with patch.object(
+            views.WizardViewSet, "_resolve_action", autospec=True, return_value="retrieve"
+        ) as resolve_action:
+            response = self.client.get(url)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        resolve_action.assert_called_once()
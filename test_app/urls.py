@@ -1,5 +1,7 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
+from drf_kit.views import CacheMetricsView
 from test_app import views
 
 router = DefaultRouter(trailing_slash=False)
@@ -105,4 +107,13 @@ router.register(
     "training-pitches",
 )
 
-urlpatterns = router.urls
+router.register(
+    r"rooms-of-requirement",
+    views.RoomOfRequirementViewSet,
+    "room-of-requirement",
+)
+
+urlpatterns = [
+    path("cache-metrics", CacheMetricsView.as_view(), name="cache-metrics"),
+    *router.urls,
+]
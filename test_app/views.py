@@ -15,7 +15,7 @@ from drf_kit.views import (
     WriteOnlyModelViewSet,
     WriteOnlyNestedModelViewSet,
 )
-from drf_kit.views.viewsets import CachedSearchableModelViewSet
+from drf_kit.views.viewsets import CachedReadOnlyModelViewSet, CachedSearchableModelViewSet
 from test_app import filters, models, serializers
 
 
@@ -145,3 +145,11 @@ class TrainingPitchViewSet(ModelViewSet):
     queryset = models.TrainingPitch.objects.all()
     serializer_class = serializers.TrainingPitchSerializer
     filterset_class = filters.TrainingPitchFilterSet
+
+
+class RoomOfRequirementViewSet(CachedReadOnlyModelViewSet):
+    queryset = models.RoomOfRequirement.objects.all()
+    serializer_class = serializers.RoomOfRequirementSerializer
+
+    def get_queryset(self):
+        return models.RoomOfRequirement.objects.current()